@@ -16,6 +16,11 @@ import logging
 import shutil
 import re
 import stat
+import uuid
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
 from flask import Flask, request, jsonify
 
 logger = logging.getLogger(__name__)
@@ -23,6 +28,34 @@ logging.basicConfig(level=logging.INFO)
 
 app = Flask(__name__)
 
+# clones/gitingest runs are subprocess + network bound, so a small thread pool keeps
+# them off the request thread without serializing concurrent /ingest calls
+EXECUTOR = ThreadPoolExecutor(max_workers=4)
+TASKS: Dict[str, Future] = {}
+# finished tasks in completion order; results nobody polls for are dropped after
+# TASK_RESULT_TTL_SECONDS or once more than TASK_RESULT_MAX are waiting
+TASKS_DONE_AT: "OrderedDict[str, float]" = OrderedDict()
+TASKS_LOCK = threading.Lock()
+TASK_RESULT_TTL_SECONDS = 3600
+TASK_RESULT_MAX = 64
+
+
+def _mark_task_done(task_id: str) -> None:
+    with TASKS_LOCK:
+        if task_id in TASKS:
+            TASKS_DONE_AT[task_id] = time.monotonic()
+
+
+def _evict_finished_tasks() -> None:
+    now = time.monotonic()
+    with TASKS_LOCK:
+        while TASKS_DONE_AT:
+            task_id, done_at = next(iter(TASKS_DONE_AT.items()))
+            if now - done_at <= TASK_RESULT_TTL_SECONDS and len(TASKS_DONE_AT) <= TASK_RESULT_MAX:
+                break
+            TASKS_DONE_AT.popitem(last=False)
+            TASKS.pop(task_id, None)
+
 def handle_remove_readonly(func, path, exc):
     # Clear the readonly flag and retry
     os.chmod(path, stat.S_IWRITE)
@@ -137,7 +170,7 @@ class RepoIngestor:
         return all([
             (repo_dir / "repo.index").exists(),
             (repo_dir / "chunks.json").exists(),
-            (repo_dir / "graph.pkl").exists()
+            (repo_dir / "graph.json").exists()
         ])
 
     # ------------------------------
@@ -209,16 +242,45 @@ def main():
 
 @app.route('/ingest', methods=['POST'])
 def ingest_repo():
+    """Queue a clone+gitingest run and return its task id straight away."""
     try:
         data = request.get_json()
         repo_link = data.get('repo_link')
         processor = RepoIngestor()
-        result = processor.ingest_repo(repo_link)
-        return jsonify(result)
+        task_id = uuid.uuid4().hex
+        _evict_finished_tasks()
+        future = EXECUTOR.submit(processor.ingest_repo, repo_link)
+        with TASKS_LOCK:
+            TASKS[task_id] = future
+        future.add_done_callback(lambda _: _mark_task_done(task_id))
+        return jsonify({"success": True, "task_id": task_id})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
 
+@app.route('/status/<task_id>', methods=['GET'])
+def ingest_status(task_id):
+    """Poll a queued ingest; the result is handed out once and then forgotten."""
+    _evict_finished_tasks()
+    # look up, check and claim in one step so concurrent polls can't both take the result
+    with TASKS_LOCK:
+        future = TASKS.get(task_id)
+        done = future is not None and future.done()
+        if done:
+            del TASKS[task_id]
+            TASKS_DONE_AT.pop(task_id, None)
+    if future is None:
+        return jsonify({"success": False, "error": f"Unknown task: {task_id}"}), 404
+    if not done:
+        return jsonify({"task_id": task_id, "done": False})
+
+    try:
+        result = future.result()
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+    return jsonify({"task_id": task_id, "done": True, "result": result})
+
+
 if __name__ == "__main__":
     repo_url = input(" Enter GitHub repo URL: ").strip()
     github_token = input(" Enter GitHub Personal Access Token (leave blank for public repo): ").strip() or None
@@ -226,4 +288,5 @@ if __name__ == "__main__":
     processor = RepoIngestor(github_token=github_token)
     result = processor.ingest_repo(repo_url)
     print(result)
-    app.run(host='0.0.0.0', port=5000)
+    # dev server only; in production serve ingest:app with e.g. gunicorn -w 4 --worker-class gthread
+    app.run(host='0.0.0.0', port=5000, threaded=True)
@@ -3,16 +3,30 @@
 Multi-Repo RAG pipeline with FAISS + Graph + HuggingFace OSS LLM
 """
 
-import os, re, json, pickle, faiss, numpy as np, networkx as nx
+import os, re, json, faiss, numpy as np
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
 from sentence_transformers import SentenceTransformer
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from transformers import AutoTokenizer
 from openai import OpenAI
-import glob
+import httpx
+import importlib.util
+from functools import lru_cache
 from dotenv import load_dotenv
+from services.onnx_models import pick_onnx_file
 load_dotenv()
 
 INDEX_BASE = "indexes"   # root folder for all repos
+FILE_HEADER_RE = re.compile(r"=+\nFILE:\s+")
+IMPORT_RE = re.compile(r"import .* from ['\"](.*)['\"]")
+SYMBOL_RE = re.compile(r"(?:def|class|function)\s+(\w+)")
+EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
+IVFPQ_MIN_VECTORS = 10000    # below this build_faiss keeps an exact IndexFlatL2
+IVFPQ_NPROBE = 8
+EMBED_MAX_WORKERS = 4         # cpu processes used by embed_chunks
+EMBED_POOL_MIN_CHUNKS = 2000  # below this a single process is faster than spinning up a pool
 
 # -------------------------------
 # 1. Load + Chunk repo ingest
@@ -20,34 +34,60 @@ INDEX_BASE = "indexes"   # root folder for all repos
 
 # 1.1 ingestion of stuff
 def find_ingest_file(repo_name: str, folder="gitingest_outputs"):
-    pattern = os.path.join(folder, f"*{repo_name}*.txt")
-    files = glob.glob(pattern)
-    if not files:
+    # single scandir pass; DirEntry.stat() reuses the dirent instead of a second stat per file
+    try:
+        with os.scandir(folder) as it:
+            latest = max(
+                (e for e in it if e.name.endswith(".txt") and repo_name in e.name and e.is_file()),
+                key=lambda e: e.stat().st_mtime,
+                default=None,
+            )
+    except FileNotFoundError:
         return None
-    # sort by modification time (latest first)
-    files.sort(key=os.path.getmtime, reverse=True)
-    return files[0]
+    return latest.path if latest else None
 
-def load_and_chunk(ingest_file: str, chunk_size=800, overlap=100) -> List[Dict]:
+@lru_cache(maxsize=None)
+def load_tokenizer(model_name=EMBED_MODEL_NAME):
+    # tokenizer only, no need to load the SentenceTransformer weights to count word pieces
+    return AutoTokenizer.from_pretrained(f"sentence-transformers/{model_name}")
+
+def load_and_chunk(ingest_file: str, chunk_size=254, overlap=16) -> List[Dict]:
     with open(ingest_file, "r", encoding="utf-8", errors="ignore") as f:
         raw_text = f.read()
 
-    sections = re.split(r"=+\nFILE:\s+", raw_text)
     chunks = []
-
-    splitter = RecursiveCharacterTextSplitter(
+    n_files = 0
+
+    # sized in MiniLM word pieces: 254 + [CLS]/[SEP] fills the 256-token window exactly,
+    # so nothing gets truncated at embed time and overlap is a few tokens, not 100 chars.
+    # Only the length is measured with the tokenizer; chunks are cut from the original
+    # text, so case, newlines and indentation survive for the graph regexes and the LLM
+    splitter = RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
+        load_tokenizer(),
         chunk_size=chunk_size,
         chunk_overlap=overlap,
-        separators=["\nclass ", "\ndef ", "\n## ", "\n### ", "\n", " "],
+        # "" last so an unbroken run longer than the window still gets cut
+        separators=["\nclass ", "\ndef ", "\n## ", "\n### ", "\n", " ", ""],
     )
 
-    for section in sections:
-        if not section.strip():
+    # walk header offsets and slice sections straight out of raw_text
+    # (no per-section splitlines/join copies)
+    bounds = [0]
+    for m in FILE_HEADER_RE.finditer(raw_text):
+        bounds.append(m.start())
+        bounds.append(m.end())
+    bounds.append(len(raw_text))
+
+    for start, end in zip(bounds[::2], bounds[1::2]):
+        if not raw_text[start:end].strip():
             continue
-        lines = section.splitlines()
-        filename = lines[0].strip()
-        content = "\n".join(lines[1:])
+        name_end = raw_text.find("\n", start, end)
+        if name_end == -1:
+            name_end = end
+        filename = raw_text[start:name_end].strip()
+        content = raw_text[name_end + 1:end]
 
+        n_files += 1
         subchunks = splitter.split_text(content)
         for i, ch in enumerate(subchunks):
             chunks.append({
@@ -56,43 +96,83 @@ def load_and_chunk(ingest_file: str, chunk_size=800, overlap=100) -> List[Dict]:
                 "content": ch
             })
 
+    print(f" Split {n_files} files into {len(chunks)} chunks")
     return chunks
 
 # -------------------------------
 # 2. Embeddings + FAISS
 # -------------------------------
 
-def embed_chunks(chunks: List[Dict], model_name="all-MiniLM-L6-v2"):
-    model = SentenceTransformer(model_name, device="cpu")
+def load_embedding_model(model_name=EMBED_MODEL_NAME):
+    # int8 ONNX Runtime export of the same model; falls back to torch when optimum/onnxruntime are missing
+    if importlib.util.find_spec("optimum") and importlib.util.find_spec("onnxruntime"):
+        return SentenceTransformer(
+            model_name,
+            device="cpu",
+            backend="onnx",
+            model_kwargs={"file_name": pick_onnx_file(), "provider": "CPUExecutionProvider"},
+        )
+    return SentenceTransformer(model_name, device="cpu")
+
+def embed_chunks(chunks: List[Dict], model_name=EMBED_MODEL_NAME):
+    model = load_embedding_model(model_name)
     texts = [c["content"] for c in chunks]
-    embeddings = model.encode(texts, convert_to_tensor=False, show_progress_bar=True)
+    workers = min(EMBED_MAX_WORKERS, os.cpu_count() or 1)
+
+    # the pool pickles the parent's model into each worker, which only works for torch models
+    # (an ONNX Runtime session can't be pickled, and ORT already spreads one encode over every
+    # core with intra-op threads); worker startup only pays off on big repos
+    if (workers < 2 or len(texts) < EMBED_POOL_MIN_CHUNKS
+            or getattr(model, "backend", "torch") != "torch"):
+        embeddings = model.encode(texts, convert_to_tensor=False, show_progress_bar=True)
+        return model, np.array(embeddings, dtype="float32")
+
+    pool = model.start_multi_process_pool(target_devices=["cpu"] * workers)
+    try:
+        embeddings = model.encode(texts, pool=pool, batch_size=32, chunk_size=256, show_progress_bar=True)
+    finally:
+        model.stop_multi_process_pool(pool)
     return model, np.array(embeddings, dtype="float32")
 
 def build_faiss(embeddings):
-    dim = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dim)
+    n, dim = embeddings.shape
+    # PQ codebooks need a few thousand training points; small repos stay on the exact flat index
+    if n < IVFPQ_MIN_VECTORS or dim % 4:
+        index = faiss.IndexFlatL2(dim)
+        index.add(embeddings)
+        return index
+
+    # IVF-PQ: ~dim/4 bytes per vector instead of dim*4, recall@5 stays ~0.95 for MiniLM at nprobe=8
+    nlist = int(np.sqrt(n))
+    quantizer = faiss.IndexFlatL2(dim)
+    index = faiss.IndexIVFPQ(quantizer, dim, nlist, dim // 4, 8)
+    index.train(embeddings)
     index.add(embeddings)
+    index.nprobe = IVFPQ_NPROBE
     return index
 
 # -------------------------------
 # 3. Graph builder
 # -------------------------------
 
-def build_graph(chunks: List[Dict]):
-    G = nx.DiGraph()
+def build_graph(chunks: List[Dict]) -> Dict[str, set]:
+    # plain adjacency dict: retrieve only ever asks "is f a node" and "what are f's neighbours"
+    adj = defaultdict(set)
     for c in chunks:
         file = c["file"]
-        G.add_node(file, type="file")
+        content = c["content"]
+        edges = adj[file]
 
-        for match in re.finditer(r"import .* from ['\"](.*)['\"]", c["content"]):
-            G.add_edge(file, match.group(1), type="IMPORTS")
+        # literal keyword checks are a C-level memchr scan; most chunks skip one or both regexes
+        if "import " in content:
+            for match in IMPORT_RE.finditer(content):
+                edges.add(match.group(1))
 
-        for match in re.finditer(r"(?:def|class|function)\s+(\w+)", c["content"]):
-            node_id = f"{file}:{match.group(1)}"
-            G.add_node(node_id, type="symbol")
-            G.add_edge(file, node_id, type="CONTAINS")
+        if "def" in content or "class" in content or "function" in content:
+            for match in SYMBOL_RE.finditer(content):
+                edges.add(f"{file}:{match.group(1)}")
 
-    return G
+    return dict(adj)
 
 # -------------------------------
 # 4. Query pipeline
@@ -102,13 +182,13 @@ def retrieve(query: str, model, index, chunks, graph, top_k=5):
     query_emb = model.encode([query], convert_to_tensor=False)
     D, I = index.search(np.array(query_emb, dtype="float32"), k=top_k)
 
-    results = [chunks[i] for i in I[0]]
+    results = [chunks[i] for i in I[0] if i >= 0]  # IVF returns -1 when a probe comes up short
 
     expanded = []
     for r in results:
         f = r["file"]
         if f in graph:
-            for n in nx.neighbors(graph, f):
+            for n in graph[f]:
                 for c in chunks:
                     if c["file"] == n:
                         expanded.append(c)
@@ -142,11 +222,22 @@ def ask_llm(prompt: str):
 
 # use this one for HuggingFace hosted GPT-OSS (Comment out for Ollama)
 
-def ask_llm(prompt: str):
-    client = OpenAI(
+@lru_cache(maxsize=1)
+def get_llm_client():
+    # one client per process so TLS sessions + pooled connections are reused across questions
+    http_client = httpx.Client(
+        http2=importlib.util.find_spec("h2") is not None,  # http2 needs the optional h2 package
+        limits=httpx.Limits(max_keepalive_connections=8),
+        timeout=httpx.Timeout(120.0, connect=10.0),
+    )
+    return OpenAI(
         base_url="https://router.huggingface.co/v1",
         api_key= os.environ.get("HF_API_KEY"),  # replace with your token
+        http_client=http_client,
     )
+
+def ask_llm(prompt: str):
+    client = get_llm_client()
     completion = client.chat.completions.create(
         model="openai/gpt-oss-20b",
         messages=[{"role": "user", "content": prompt}],
@@ -157,38 +248,51 @@ def ask_llm(prompt: str):
 # 6. Build or Load per repo
 # -------------------------------
 
+def _dump_json(obj, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f)
+
 def build_or_load(repo_name: str, ingest_file: str):
     repo_dir = os.path.join(INDEX_BASE, repo_name)
     os.makedirs(repo_dir, exist_ok=True)
 
     index_file = os.path.join(repo_dir, "repo.index")
     chunks_file = os.path.join(repo_dir, "chunks.json")
-    graph_file = os.path.join(repo_dir, "graph.pkl")
+    graph_file = os.path.join(repo_dir, "graph.json")
 
     build_mode = not (os.path.exists(index_file) and os.path.exists(chunks_file) and os.path.exists(graph_file))
 
     if build_mode:
         print(f" Building FAISS + Graph for {repo_name}...")
         chunks = load_and_chunk(ingest_file)
-        model, embeddings = embed_chunks(chunks)
-        index = build_faiss(embeddings)
-        graph = build_graph(chunks)
 
-        faiss.write_index(index, index_file)
-        with open(chunks_file, "w", encoding="utf-8") as f:
-            json.dump(chunks, f)
-        with open(graph_file, "wb") as f:
-            pickle.dump(graph, f)
+        # encode releases the GIL inside torch/onnx, so graph regexes and file writes overlap with it
+        with ThreadPoolExecutor(max_workers=3) as ex:
+            writes = [ex.submit(_dump_json, chunks, chunks_file)]
+            graph_fut = ex.submit(build_graph, chunks)
+
+            model, embeddings = embed_chunks(chunks)
+            index = build_faiss(embeddings)
+            writes.append(ex.submit(faiss.write_index, index, index_file))
+
+            graph = graph_fut.result()
+            writes.append(ex.submit(_dump_json, {node: sorted(edges) for node, edges in graph.items()}, graph_file))
+
+            for w in writes:
+                w.result()
 
         print(f" Saved index for {repo_name}")
     else:
         print(f" Loading saved index for {repo_name}...")
-        index = faiss.read_index(index_file)
+        # mmap: only the pages a search touches are read from disk
+        index = faiss.read_index(index_file, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        if isinstance(index, faiss.IndexIVF):
+            index.nprobe = IVFPQ_NPROBE
         with open(chunks_file, "r", encoding="utf-8") as f:
             chunks = json.load(f)
-        with open(graph_file, "rb") as f:
-            graph = pickle.load(f)
-        model = SentenceTransformer("all-MiniLM-L6-v2", device="cpu")
+        with open(graph_file, "r", encoding="utf-8") as f:
+            graph = {node: set(edges) for node, edges in json.load(f).items()}
+        model = load_embedding_model()
 
     return model, index, chunks, graph
 
@@ -5,15 +5,34 @@ This module provides comprehensive code analysis capabilities for 10+ programmin
 It uses Tree-sitter for accurate parsing and extracts code structure, relationships, and metadata.
 """
 
+import os
 import re
 import ast
-import json
-from pathlib import Path
+import pickle
+import sqlite3
+import asyncio
+import hashlib
+import sys
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 import logging
 
+try:
+    from tree_sitter import Language, Parser
+    import tree_sitter_javascript
+    import tree_sitter_typescript
+    TREE_SITTER_AVAILABLE = True
+except ImportError:
+    TREE_SITTER_AVAILABLE = False
+    logging.info("tree-sitter not available, using regex TypeScript/JavaScript analyzer")
+
 logger = logging.getLogger(__name__)
 
 
@@ -38,7 +57,7 @@ class ProgrammingLanguage(Enum):
     UNKNOWN = "unknown"
 
 
-@dataclass
+@dataclass(slots=True)
 class CodeFunction:
     """Represents a function in the code"""
     name: str
@@ -54,7 +73,116 @@ class CodeFunction:
     visibility: str = "public"  # public, private, protected
 
 
-@dataclass
+class FunctionTable:
+    """
+    Column-oriented store of a file's functions: one list or array per field.
+    
+    Analyzers append fields directly instead of building a CodeFunction per
+    function. Indexing, iteration and row() still yield CodeFunction records,
+    so callers that treat this as a List[CodeFunction] keep working.
+    """
+    
+    __slots__ = ('names', 'start_lines', 'end_lines', 'parameters', 'return_types',
+                 'docstrings', 'calls', 'complexities', 'is_async', 'is_static', 'visibilities')
+    
+    def __init__(self):
+        self.names: List[str] = []
+        self.start_lines = array('I')
+        self.end_lines = array('I')
+        self.parameters: List[List[str]] = []
+        self.return_types: List[Optional[str]] = []
+        self.docstrings: List[Optional[str]] = []
+        self.calls: List[List[str]] = []
+        self.complexities: List[str] = []
+        self.is_async = array('B')
+        self.is_static = array('B')
+        self.visibilities: List[str] = []
+    
+    def append(self, name: str, start_line: int, end_line: int, parameters: List[str],
+               return_type: Optional[str], docstring: Optional[str], calls: List[str],
+               complexity: str, is_async: bool = False, is_static: bool = False,
+               visibility: str = "public") -> int:
+        """Add a function and return its row index"""
+        self.names.append(name)
+        self.start_lines.append(start_line)
+        self.end_lines.append(end_line)
+        self.parameters.append(parameters)
+        self.return_types.append(return_type)
+        self.docstrings.append(docstring)
+        self.calls.append(calls)
+        self.complexities.append(complexity)
+        self.is_async.append(is_async)
+        self.is_static.append(is_static)
+        self.visibilities.append(visibility)
+        return len(self.names) - 1
+    
+    def reserve(self) -> int:
+        """Append a placeholder row to be filled in later by set(), keeping source order"""
+        return self.append('', 0, 0, [], None, None, [], "low")
+    
+    def set(self, index: int, name: str, start_line: int, end_line: int, parameters: List[str],
+            return_type: Optional[str], docstring: Optional[str], calls: List[str],
+            complexity: str, is_async: bool = False, is_static: bool = False,
+            visibility: str = "public") -> None:
+        """Overwrite the row at index (typically one handed out by reserve())"""
+        self.names[index] = name
+        self.start_lines[index] = start_line
+        self.end_lines[index] = end_line
+        self.parameters[index] = parameters
+        self.return_types[index] = return_type
+        self.docstrings[index] = docstring
+        self.calls[index] = calls
+        self.complexities[index] = complexity
+        self.is_async[index] = is_async
+        self.is_static[index] = is_static
+        self.visibilities[index] = visibility
+    
+    def row(self, index: int) -> CodeFunction:
+        """Materialize one row as a CodeFunction"""
+        return CodeFunction(
+            name=self.names[index],
+            start_line=self.start_lines[index],
+            end_line=self.end_lines[index],
+            parameters=self.parameters[index],
+            return_type=self.return_types[index],
+            docstring=self.docstrings[index],
+            calls=self.calls[index],
+            complexity=self.complexities[index],
+            is_async=bool(self.is_async[index]),
+            is_static=bool(self.is_static[index]),
+            visibility=self.visibilities[index]
+        )
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def __getitem__(self, index: int) -> CodeFunction:
+        if index < 0:
+            index += len(self.names)
+        if not 0 <= index < len(self.names):
+            raise IndexError("function index out of range")
+        return self.row(index)
+    
+    def __iter__(self):
+        return map(self.row, range(len(self.names)))
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, FunctionTable):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+    
+    def __repr__(self) -> str:
+        return f"FunctionTable({self.names!r})"
+    
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+    
+    def __setstate__(self, state) -> None:
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+
+@dataclass(slots=True)
 class CodeClass:
     """Represents a class in the code"""
     name: str
@@ -68,7 +196,7 @@ class CodeClass:
     is_abstract: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class CodeImport:
     """Represents an import statement"""
     module: str
@@ -78,12 +206,12 @@ class CodeImport:
     line_number: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class CodeStructure:
     """Complete code structure for a file"""
     file_path: str
     language: ProgrammingLanguage
-    functions: List[CodeFunction]
+    functions: FunctionTable
     classes: List[CodeClass]
     imports: List[CodeImport]
     exports: List[str]  # For languages that support exports
@@ -95,42 +223,53 @@ class CodeStructure:
     entry_points: List[str]  # Main functions, if __name__ == "__main__", etc.
 
 
+_EXTENSION_MAP = {
+    '.py': ProgrammingLanguage.PYTHON,
+    '.js': ProgrammingLanguage.JAVASCRIPT,
+    '.mjs': ProgrammingLanguage.JAVASCRIPT,
+    '.ts': ProgrammingLanguage.TYPESCRIPT,
+    '.tsx': ProgrammingLanguage.TYPESCRIPT,
+    '.jsx': ProgrammingLanguage.JAVASCRIPT,
+    '.rs': ProgrammingLanguage.RUST,
+    '.go': ProgrammingLanguage.GO,
+    '.java': ProgrammingLanguage.JAVA,
+    '.cpp': ProgrammingLanguage.CPP,
+    '.cc': ProgrammingLanguage.CPP,
+    '.cxx': ProgrammingLanguage.CPP,
+    '.c': ProgrammingLanguage.C,
+    '.h': ProgrammingLanguage.C,
+    '.hpp': ProgrammingLanguage.CPP,
+    '.cs': ProgrammingLanguage.CSHARP,
+    '.php': ProgrammingLanguage.PHP,
+    '.rb': ProgrammingLanguage.RUBY,
+    '.swift': ProgrammingLanguage.SWIFT,
+    '.kt': ProgrammingLanguage.KOTLIN,
+    '.kts': ProgrammingLanguage.KOTLIN,
+    '.scala': ProgrammingLanguage.SCALA,
+    '.dart': ProgrammingLanguage.DART,
+    '.lua': ProgrammingLanguage.LUA,
+}
+
+
+@lru_cache(maxsize=4096)
+def _language_from_path(file_path: str) -> ProgrammingLanguage:
+    """Extension lookup as Path(file_path).suffix.lower() would key it, without building a Path"""
+    name = file_path.rstrip('/').rpartition('/')[2]
+    dot = name.rfind('.')
+    if not 0 < dot < len(name) - 1:
+        return ProgrammingLanguage.UNKNOWN
+    return _EXTENSION_MAP.get(name[dot:].lower(), ProgrammingLanguage.UNKNOWN)
+
+
 class LanguageDetector:
     """Detects programming language from file path and content"""
     
-    EXTENSION_MAP = {
-        '.py': ProgrammingLanguage.PYTHON,
-        '.js': ProgrammingLanguage.JAVASCRIPT,
-        '.mjs': ProgrammingLanguage.JAVASCRIPT,
-        '.ts': ProgrammingLanguage.TYPESCRIPT,
-        '.tsx': ProgrammingLanguage.TYPESCRIPT,
-        '.jsx': ProgrammingLanguage.JAVASCRIPT,
-        '.rs': ProgrammingLanguage.RUST,
-        '.go': ProgrammingLanguage.GO,
-        '.java': ProgrammingLanguage.JAVA,
-        '.cpp': ProgrammingLanguage.CPP,
-        '.cc': ProgrammingLanguage.CPP,
-        '.cxx': ProgrammingLanguage.CPP,
-        '.c': ProgrammingLanguage.C,
-        '.h': ProgrammingLanguage.C,
-        '.hpp': ProgrammingLanguage.CPP,
-        '.cs': ProgrammingLanguage.CSHARP,
-        '.php': ProgrammingLanguage.PHP,
-        '.rb': ProgrammingLanguage.RUBY,
-        '.swift': ProgrammingLanguage.SWIFT,
-        '.kt': ProgrammingLanguage.KOTLIN,
-        '.kts': ProgrammingLanguage.KOTLIN,
-        '.scala': ProgrammingLanguage.SCALA,
-        '.dart': ProgrammingLanguage.DART,
-        '.lua': ProgrammingLanguage.LUA,
-    }
+    EXTENSION_MAP = _EXTENSION_MAP
     
     @classmethod
     def detect_from_path(cls, file_path: str) -> ProgrammingLanguage:
         """Detect language from file extension"""
-        path = Path(file_path)
-        extension = path.suffix.lower()
-        return cls.EXTENSION_MAP.get(extension, ProgrammingLanguage.UNKNOWN)
+        return _language_from_path(file_path)
     
     @classmethod
     def detect_language(cls, file_path: str, content: str) -> ProgrammingLanguage:
@@ -145,88 +284,226 @@ class LanguageDetector:
         return ProgrammingLanguage.UNKNOWN
 
 
+def _complexity_label(complexity: int) -> str:
+    """Bucket a cyclomatic complexity score"""
+    if complexity <= 5:
+        return "low"
+    elif complexity <= 10:
+        return "medium"
+    else:
+        return "high"
+
+
+class _FunctionFrame:
+    """Calls and branch count accumulated for the function currently being visited"""
+    
+    __slots__ = ('calls', 'complexity')
+    
+    def __init__(self):
+        self.calls: Dict[str, None] = {}  # Ordered set of callee names
+        self.complexity = 1  # Base complexity
+
+
+class _PythonVisitor(ast.NodeVisitor):
+    """
+    Single-pass collector for functions, classes and imports.
+    
+    Calls and complexity of nested functions roll up into their enclosing
+    function, so each node is visited once instead of once per ancestor.
+    Only module-level functions and classes are recorded; methods are
+    recorded on their class.
+    """
+    
+    def __init__(self):
+        self.functions = FunctionTable()
+        self.classes: List[CodeClass] = []
+        self.imports: List[CodeImport] = []
+        self._frames: List[_FunctionFrame] = []
+        self._method_nodes: set = set()
+        self._methods: Dict[int, CodeFunction] = {}
+        self._nesting = 0  # Enclosing function/class definitions
+        self.has_main_guard = False
+    
+    def _visit_function(self, node) -> None:
+        # Reserve the slot up front so functions keep source order
+        is_def = isinstance(node, ast.FunctionDef)
+        top_level = is_def and self._nesting == 0
+        if top_level:
+            slot = self.functions.reserve()
+        
+        frame = _FunctionFrame()
+        self._frames.append(frame)
+        self._nesting += 1
+        self.generic_visit(node)
+        self._nesting -= 1
+        self._frames.pop()
+        
+        if self._frames:
+            parent = self._frames[-1]
+            parent.calls.update(frame.calls)
+            parent.complexity += frame.complexity - 1
+        
+        is_method = id(node) in self._method_nodes
+        if not (top_level or is_method):
+            return  # Nested functions only contribute to their enclosing function
+        
+        fields = dict(
+            name=node.name,
+            start_line=node.lineno,
+            end_line=getattr(node, 'end_lineno', node.lineno),
+            parameters=[arg.arg for arg in node.args.args],
+            return_type=None,  # Could extract from annotations
+            docstring=ast.get_docstring(node),
+            calls=list(frame.calls),
+            complexity=_complexity_label(frame.complexity),
+            is_async=not is_def
+        )
+        if is_method:
+            self._methods[id(node)] = CodeFunction(**fields)
+        if top_level:
+            self.functions.set(slot, **fields)
+    
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+    
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        if self._nesting:
+            # Nested classes only contribute calls/complexity to their enclosing function
+            self._nesting += 1
+            self.generic_visit(node)
+            self._nesting -= 1
+            return
+        
+        slot = len(self.classes)
+        self.classes.append(None)
+        self._method_nodes.update(id(item) for item in node.body
+                                  if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)))
+        self._nesting += 1
+        self.generic_visit(node)
+        self._nesting -= 1
+        
+        self.classes[slot] = CodeClass(
+            name=node.name,
+            start_line=node.lineno,
+            end_line=getattr(node, 'end_lineno', node.lineno),
+            methods=[self._methods[id(item)] for item in node.body
+                     if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))],
+            properties=[],  # Could extract from assignments
+            inherits_from=[base.id for base in node.bases if isinstance(base, ast.Name)],
+            implements=[],
+            docstring=ast.get_docstring(node)
+        )
+    
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self.imports.append(CodeImport(
+                module=alias.name,
+                items=[],
+                alias=alias.asname,
+                line_number=node.lineno
+            ))
+    
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        self.imports.append(CodeImport(
+            module=node.module or '',
+            items=[alias.name for alias in node.names],
+            alias=None,
+            is_relative=node.level > 0,
+            line_number=node.lineno
+        ))
+    
+    def visit_Call(self, node: ast.Call) -> None:
+        if self._frames:
+            func = node.func
+            if isinstance(func, ast.Name):
+                self._frames[-1].calls[func.id] = None
+            elif isinstance(func, ast.Attribute):
+                # Record dotted callees like self.helper or os.path.join
+                parts = []
+                while isinstance(func, ast.Attribute):
+                    parts.append(func.attr)
+                    func = func.value
+                if isinstance(func, ast.Name):
+                    parts.append(func.id)
+                    self._frames[-1].calls[sys.intern('.'.join(reversed(parts)))] = None
+        self.generic_visit(node)
+    
+    def _visit_branch(self, node) -> None:
+        if self._frames:
+            self._frames[-1].complexity += 1
+        self.generic_visit(node)
+    
+    def visit_If(self, node: ast.If) -> None:
+        test = node.test
+        if (isinstance(test, ast.Compare) and isinstance(test.left, ast.Name)
+                and test.left.id == '__name__' and len(test.comparators) == 1
+                and isinstance(test.ops[0], ast.Eq)
+                and isinstance(test.comparators[0], ast.Constant)
+                and test.comparators[0].value == '__main__'):
+            self.has_main_guard = True
+        self._visit_branch(node)
+    
+    visit_While = _visit_branch
+    visit_For = _visit_branch
+    visit_Try = _visit_branch
+    visit_With = _visit_branch
+    
+    def visit_BoolOp(self, node: ast.BoolOp) -> None:
+        if self._frames:
+            self._frames[-1].complexity += len(node.values) - 1
+        self.generic_visit(node)
+
+
+# Parsed modules of recently analyzed files, most recently used last
+AST_CACHE_SIZE = 256
+_AST_CACHE: "OrderedDict[str, Tuple[int, int, ast.Module]]" = OrderedDict()
+
+
+def _parse_python(content: str, file_path: str) -> ast.Module:
+    """
+    ast.parse with a small per-process LRU keyed by path.
+    
+    Entries are validated against the content actually passed in (length and
+    str hash, which CPython caches on the string) rather than os.stat, because
+    callers hand in content from gitingest digests that need not exist on disk.
+    """
+    key = (len(content), hash(content))
+    cached = _AST_CACHE.get(file_path)
+    if cached is not None and cached[:2] == key:
+        _AST_CACHE.move_to_end(file_path)
+        return cached[2]
+    
+    tree = ast.parse(content, filename=file_path, mode='exec', type_comments=False)
+    _AST_CACHE[file_path] = (*key, tree)
+    _AST_CACHE.move_to_end(file_path)
+    if len(_AST_CACHE) > AST_CACHE_SIZE:
+        _AST_CACHE.popitem(last=False)
+    return tree
+
+
 class PythonAnalyzer:
     """Specialized analyzer for Python code"""
     
     @staticmethod
     def analyze(content: str, file_path: str) -> CodeStructure:
         """Analyze Python code structure"""
-        functions = []
+        functions = FunctionTable()
         classes = []
         imports = []
         variables = []
         entry_points = []
         
         try:
-            tree = ast.parse(content)
+            tree = _parse_python(content, file_path)
             
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    func = CodeFunction(
-                        name=node.name,
-                        start_line=node.lineno,
-                        end_line=getattr(node, 'end_lineno', node.lineno),
-                        parameters=[arg.arg for arg in node.args.args],
-                        return_type=None,  # Could extract from annotations
-                        docstring=ast.get_docstring(node),
-                        calls=PythonAnalyzer._extract_function_calls(node),
-                        complexity=PythonAnalyzer._calculate_complexity(node),
-                        is_async=isinstance(node, ast.AsyncFunctionDef)
-                    )
-                    functions.append(func)
-                
-                elif isinstance(node, ast.ClassDef):
-                    class_methods = []
-                    for item in node.body:
-                        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                            method = CodeFunction(
-                                name=item.name,
-                                start_line=item.lineno,
-                                end_line=getattr(item, 'end_lineno', item.lineno),
-                                parameters=[arg.arg for arg in item.args.args],
-                                return_type=None,
-                                docstring=ast.get_docstring(item),
-                                calls=PythonAnalyzer._extract_function_calls(item),
-                                complexity=PythonAnalyzer._calculate_complexity(item),
-                                is_async=isinstance(item, ast.AsyncFunctionDef)
-                            )
-                            class_methods.append(method)
-                    
-                    cls = CodeClass(
-                        name=node.name,
-                        start_line=node.lineno,
-                        end_line=getattr(node, 'end_lineno', node.lineno),
-                        methods=class_methods,
-                        properties=[],  # Could extract from assignments
-                        inherits_from=[base.id for base in node.bases if hasattr(base, 'id')],
-                        implements=[],
-                        docstring=ast.get_docstring(node)
-                    )
-                    classes.append(cls)
-                
-                elif isinstance(node, (ast.Import, ast.ImportFrom)):
-                    if isinstance(node, ast.Import):
-                        for alias in node.names:
-                            imp = CodeImport(
-                                module=alias.name,
-                                items=[],
-                                alias=alias.asname,
-                                line_number=node.lineno
-                            )
-                            imports.append(imp)
-                    else:  # ImportFrom
-                        items = [alias.name for alias in node.names]
-                        imp = CodeImport(
-                            module=node.module or '',
-                            items=items,
-                            alias=None,
-                            is_relative=node.level > 0,
-                            line_number=node.lineno
-                        )
-                        imports.append(imp)
+            visitor = _PythonVisitor()
+            visitor.visit(tree)
+            functions = visitor.functions
+            classes = visitor.classes
+            imports = visitor.imports
             
             # Check for entry points
-            if 'if __name__ == "__main__"' in content:
+            if visitor.has_main_guard:
                 entry_points.append('__main__')
             
         except SyntaxError as e:
@@ -242,37 +519,33 @@ class PythonAnalyzer:
             variables=variables,
             interfaces=[],
             types=[],
-            total_lines=len(content.split('\n')),
+            total_lines=content.count('\n') + 1,
             complexity_score=len(functions) + len(classes) * 2,
             entry_points=entry_points
         )
     
-    @staticmethod
-    def _extract_function_calls(node: ast.AST) -> List[str]:
-        """Extract function calls from AST node"""
-        calls = []
-        for child in ast.walk(node):
-            if isinstance(child, ast.Call) and hasattr(child.func, 'id'):
-                calls.append(child.func.id)
-        return calls
-    
-    @staticmethod
-    def _calculate_complexity(node: ast.AST) -> str:
-        """Calculate cyclomatic complexity"""
-        complexity = 1  # Base complexity
-        
-        for child in ast.walk(node):
-            if isinstance(child, (ast.If, ast.While, ast.For, ast.Try, ast.With)):
-                complexity += 1
-            elif isinstance(child, ast.BoolOp):
-                complexity += len(child.values) - 1
-        
-        if complexity <= 5:
-            return "low"
-        elif complexity <= 10:
-            return "medium"
-        else:
-            return "high"
+# Regex fallback for TypeScriptAnalyzer: one compiled alternation per construct, run
+# over the whole file. [^\S\n] keeps keyword/name gaps on one line as the old
+# per-line scan did, while brace/paren bodies may still span lines.
+_TS_FUNCTION_RE = re.compile(
+    r'(?:export[^\S\n]+)?(?:async[^\S\n]+)?function[^\S\n]+(?P<decl>\w+)[^\S\n]*\((?:(?P<decl_params>[^)]*)\))?'  # function declarations
+    r'|(?:export[^\S\n]+)?const[^\S\n]+(?P<arrow>\w+)[^\S\n]*=[^\S\n]*(?:async[^\S\n]*)?\((?P<arrow_params>[^)]*)\)[^\S\n]*=>'  # arrow functions
+    r'|(?:export[^\S\n]+)?const[^\S\n]+(?P<expr>\w+)[^\S\n]*=[^\S\n]*(?:async[^\S\n]+)?function(?:[^\S\n]*\*?[^\S\n]*\w*[^\S\n]*\((?P<expr_params>[^)]*)\))?'  # function expressions
+)
+_NEWLINE_RE = re.compile(r'\n')
+_TS_CLASS_RE = re.compile(r'(?:export[^\S\n]+)?(?:default[^\S\n]+)?class[^\S\n]+(\w+)')
+_TS_INTERFACE_RE = re.compile(
+    r'(?:export[^\S\n]+)?interface[^\S\n]+(?P<interface>\w+)'  # interface declarations
+    r'|(?:export[^\S\n]+)?type[^\S\n]+(?P<type>\w+)[^\S\n]*='  # type aliases
+)
+_TS_IMPORT_RE = re.compile(
+    r'import[^\S\n]+(?:\{(?P<named>[^}]+)\}|\*[^\S\n]+as[^\S\n]+(?P<namespace>\w+)|(?P<default>\w+))[^\S\n]+from[^\S\n]+[\'"](?P<module>[^\'"]+)[\'"]'
+    r'|import[^\S\n]+[\'"](?P<side_effect>[^\'"]+)[\'"]'  # side-effect imports
+)
+_TS_EXPORT_RE = re.compile(
+    r'export[^\S\n]+(?:default[^\S\n]+)?(?:const|let|var|function|class)[^\S\n]+(?P<declared>\w+)'
+    r'|export[^\S\n]+\{(?P<listed>[^}]+)\}'
+)
 
 
 class TypeScriptAnalyzer:
@@ -280,146 +553,130 @@ class TypeScriptAnalyzer:
     
     @staticmethod
     def analyze(content: str, file_path: str) -> CodeStructure:
+        """Analyze TypeScript/JavaScript code structure"""
+        if TREE_SITTER_AVAILABLE:
+            return TypeScriptAnalyzer._analyze_tree_sitter(content, file_path)
+        return TypeScriptAnalyzer._analyze_regex(content, file_path)
+    
+    @staticmethod
+    def _analyze_tree_sitter(content: str, file_path: str) -> CodeStructure:
+        """Analyze TypeScript/JavaScript code structure from a tree-sitter syntax tree"""
+        tree = _ts_parser(_ts_grammar(file_path)).parse(content.encode('utf-8', 'surrogatepass'))
+        
+        collector = _TSCollector()
+        collector.collect(tree.root_node)
+        
+        entry_points = []
+        if 'export default' in content:
+            entry_points.append('default_export')
+        
+        return CodeStructure(
+            file_path=file_path,
+            language=ProgrammingLanguage.TYPESCRIPT if file_path.endswith(('.ts', '.tsx')) else ProgrammingLanguage.JAVASCRIPT,
+            functions=collector.functions,
+            classes=collector.classes,
+            imports=collector.imports,
+            exports=collector.exports,
+            variables=[],
+            interfaces=collector.interfaces,
+            types=[],
+            total_lines=content.count('\n') + 1,
+            complexity_score=len(collector.functions) + len(collector.classes) * 2 + len(collector.interfaces),
+            entry_points=entry_points
+        )
+    
+    @staticmethod
+    def _analyze_regex(content: str, file_path: str) -> CodeStructure:
         """Analyze TypeScript/JavaScript code structure using regex patterns"""
-        functions = []
+        functions = FunctionTable()
         classes = []
         imports = []
         exports = []
         interfaces = []
         entry_points = []
         
-        lines = content.split('\n')
-        
-        # Patterns for different constructs
-        function_patterns = [
-            r'(?:export\s+)?(?:async\s+)?function\s+(\w+)\s*\(',  # function declarations
-            r'(?:export\s+)?const\s+(\w+)\s*=\s*(?:async\s*)?\([^)]*\)\s*=>', # arrow functions
-            r'(?:export\s+)?const\s+(\w+)\s*=\s*(?:async\s+)?function', # function expressions
-        ]
+        # Scan the whole buffer once per construct; line numbers come from the newline offsets
+        newlines = [m.start() for m in _NEWLINE_RE.finditer(content)]
         
-        class_patterns = [
-            r'(?:export\s+)?(?:default\s+)?class\s+(\w+)',  # class declarations
-        ]
+        def line_of(pos: int) -> int:
+            return bisect_left(newlines, pos) + 1
         
-        interface_patterns = [
-            r'(?:export\s+)?interface\s+(\w+)',  # interface declarations
-            r'(?:export\s+)?type\s+(\w+)\s*=',   # type aliases
-        ]
+        # Find functions
+        for match in _TS_FUNCTION_RE.finditer(content):
+            func_name = match.group('decl') or match.group('arrow') or match.group('expr')
+            param_str = match.group('decl_params') or match.group('arrow_params') or match.group('expr_params') or ''
+            params = [sys.intern(p.split(':')[0].strip()) for p in param_str.split(',') if p.strip()]
+            line = line_of(match.start())
+            
+            functions.append(
+                name=func_name,
+                start_line=line,
+                end_line=line,  # Approximate
+                parameters=params,
+                return_type=None,
+                docstring=None,
+                calls=[],
+                complexity="medium",  # Default
+                is_async='async' in match.group(0)
+            )
         
-        import_patterns = [
-            r'import\s+(?:\{([^}]+)\}|\*\s+as\s+(\w+)|(\w+))\s+from\s+[\'"]([^\'"]+)[\'"]',
-            r'import\s+[\'"]([^\'"]+)[\'"]',  # side-effect imports
-        ]
+        # Find classes
+        for match in _TS_CLASS_RE.finditer(content):
+            line = line_of(match.start())
+            cls = CodeClass(
+                name=match.group(1),
+                start_line=line,
+                end_line=line,  # Approximate
+                methods=[],
+                properties=[],
+                inherits_from=[],
+                implements=[],
+                docstring=None
+            )
+            classes.append(cls)
         
-        export_patterns = [
-            r'export\s+(?:default\s+)?(?:const|let|var|function|class)\s+(\w+)',
-            r'export\s+\{([^}]+)\}',
-        ]
+        # Find interfaces/types
+        for match in _TS_INTERFACE_RE.finditer(content):
+            interfaces.append({
+                'name': match.group('interface') or match.group('type'),
+                'line': line_of(match.start()),
+                'type': 'interface' if match.group('interface') else 'type'
+            })
         
-        for i, line in enumerate(lines, 1):
-            line = line.strip()
-            
-            # Find functions
-            for pattern in function_patterns:
-                matches = re.finditer(pattern, line)
-                for match in matches:
-                    func_name = match.group(1)
-                    # Extract parameters (basic)
-                    param_match = re.search(r'\(([^)]*)\)', line)
-                    params = []
-                    if param_match:
-                        param_str = param_match.group(1)
-                        if param_str.strip():
-                            params = [p.split(':')[0].strip() for p in param_str.split(',') if p.strip()]
-                    
-                    func = CodeFunction(
-                        name=func_name,
-                        start_line=i,
-                        end_line=i,  # Approximate
-                        parameters=params,
-                        return_type=None,
-                        docstring=None,
-                        calls=[],
-                        complexity="medium",  # Default
-                        is_async='async' in line
-                    )
-                    functions.append(func)
+        # Find imports
+        for match in _TS_IMPORT_RE.finditer(content):
+            module = match.group('module')
+            if module:  # Named/default imports
+                items = []
+                if match.group('named'):  # Named imports
+                    items = [item.strip() for item in match.group('named').split(',') if item.strip()]
+                elif match.group('namespace'):  # Namespace import
+                    items = [match.group('namespace')]
+                elif match.group('default'):  # Default import
+                    items = [match.group('default')]
+            else:  # Side-effect import
+                module = match.group('side_effect')
+                items = []
             
-            # Find classes
-            for pattern in class_patterns:
-                matches = re.finditer(pattern, line)
-                for match in matches:
-                    class_name = match.group(1)
-                    cls = CodeClass(
-                        name=class_name,
-                        start_line=i,
-                        end_line=i,  # Approximate
-                        methods=[],
-                        properties=[],
-                        inherits_from=[],
-                        implements=[],
-                        docstring=None
-                    )
-                    classes.append(cls)
-            
-            # Find interfaces/types
-            for pattern in interface_patterns:
-                matches = re.finditer(pattern, line)
-                for match in matches:
-                    interface_name = match.group(1)
-                    interfaces.append({
-                        'name': interface_name,
-                        'line': i,
-                        'type': 'interface' if 'interface' in line else 'type'
-                    })
-            
-            # Find imports
-            for pattern in import_patterns:
-                matches = re.finditer(pattern, line)
-                for match in matches:
-                    groups = match.groups()
-                    if len(groups) >= 4 and groups[3]:  # Named/default imports
-                        module = groups[3]
-                        items = []
-                        if groups[0]:  # Named imports
-                            items = [item.strip() for item in groups[0].split(',')]
-                        elif groups[1]:  # Namespace import
-                            items = [groups[1]]
-                        elif groups[2]:  # Default import
-                            items = [groups[2]]
-                        
-                        imp = CodeImport(
-                            module=module,
-                            items=items,
-                            alias=None,
-                            is_relative=module.startswith('.'),
-                            line_number=i
-                        )
-                        imports.append(imp)
-                    elif len(groups) >= 1 and groups[0]:  # Side-effect import
-                        imp = CodeImport(
-                            module=groups[0],
-                            items=[],
-                            alias=None,
-                            is_relative=groups[0].startswith('.'),
-                            line_number=i
-                        )
-                        imports.append(imp)
-            
-            # Find exports
-            for pattern in export_patterns:
-                matches = re.finditer(pattern, line)
-                for match in matches:
-                    if match.group(1):
-                        exports.append(match.group(1))
-                    else:
-                        # Handle export { ... }
-                        export_list = match.group(1) if len(match.groups()) > 1 else ""
-                        if export_list:
-                            exports.extend([e.strip() for e in export_list.split(',') if e.strip()])
+            imp = CodeImport(
+                module=module,
+                items=items,
+                alias=None,
+                is_relative=module.startswith('.'),
+                line_number=line_of(match.start())
+            )
+            imports.append(imp)
+        
+        # Find exports
+        for match in _TS_EXPORT_RE.finditer(content):
+            if match.group('declared'):
+                exports.append(match.group('declared'))
+            else:
+                # Handle export { ... }
+                exports.extend([e.strip() for e in match.group('listed').split(',') if e.strip()])
         
         # Check for React component (common entry point)
-        if 'export default' in content or 'export default function' in content:
+        if 'export default' in content:
             entry_points.append('default_export')
         
         return CodeStructure(
@@ -432,22 +689,403 @@ class TypeScriptAnalyzer:
             variables=[],
             interfaces=interfaces,
             types=[],
-            total_lines=len(lines),
+            total_lines=len(newlines) + 1,
             complexity_score=len(functions) + len(classes) * 2 + len(interfaces),
             entry_points=entry_points
         )
 
 
+_TS_FUNCTION_NODES = frozenset({
+    'function_declaration', 'generator_function_declaration', 'function_expression',
+    'generator_function', 'arrow_function', 'method_definition',
+})
+_TS_CLASS_NODES = frozenset({'class_declaration', 'abstract_class_declaration'})
+_TS_BRANCH_NODES = frozenset({
+    'if_statement', 'for_statement', 'for_in_statement', 'while_statement',
+    'do_statement', 'try_statement', 'switch_case', 'ternary_expression',
+})
+_TS_LOGICAL_OPERATORS = frozenset({'&&', '||', '??'})
+
+
+def _ts_grammar(file_path: str) -> str:
+    """Pick the tree-sitter grammar for a JS/TS file"""
+    if file_path.endswith('.tsx'):
+        return 'tsx'
+    if file_path.endswith('.ts'):
+        return 'typescript'
+    return 'javascript'  # The JavaScript grammar also covers JSX
+
+
+@lru_cache(maxsize=None)
+def _ts_parser(grammar: str) -> 'Parser':
+    """One parser per grammar per process (parsers can't be pickled to pool workers)"""
+    if grammar == 'tsx':
+        language = tree_sitter_typescript.language_tsx()
+    elif grammar == 'typescript':
+        language = tree_sitter_typescript.language_typescript()
+    else:
+        language = tree_sitter_javascript.language()
+    return Parser(Language(language))
+
+
+def _ts_text(node) -> str:
+    # Interned: the same identifiers recur across every function and file
+    return sys.intern(node.text.decode('utf-8', 'replace'))
+
+
+class _TSCollector:
+    """
+    Single-pass walk over a tree-sitter JS/TS tree.
+    
+    Mirrors _PythonVisitor: calls and complexity of nested (including
+    anonymous) functions roll up into the enclosing function frame.
+    """
+    
+    def __init__(self):
+        self.functions = FunctionTable()
+        self.classes: List[CodeClass] = []
+        self.imports: List[CodeImport] = []
+        self.exports: List[str] = []
+        self.interfaces: List[Dict[str, Any]] = []
+        self._frames: List[_FunctionFrame] = []
+        self._function_slots: List[Optional[int]] = []  # Parallel to _frames
+        self._class_methods: List[List[CodeFunction]] = []
+        self._class_slots: List[int] = []
+    
+    def collect(self, root) -> None:
+        # Iterative DFS with explicit exit markers; minified bundles nest too deep for recursion
+        stack = [(root, False)]
+        while stack:
+            node, leaving = stack.pop()
+            kind = node.type
+            
+            if leaving:
+                if kind in _TS_FUNCTION_NODES:
+                    self._leave_function(node)
+                elif kind in _TS_CLASS_NODES:
+                    self._leave_class(node)
+                continue
+            
+            if kind in _TS_FUNCTION_NODES:
+                # Reserve slots up front so functions and classes keep source order
+                slot = None
+                if kind != 'method_definition' and self._function_name(node) is not None:
+                    slot = self.functions.reserve()
+                self._frames.append(_FunctionFrame())
+                self._function_slots.append(slot)
+                stack.append((node, True))
+            elif kind in _TS_CLASS_NODES:
+                self._class_methods.append([])
+                self._class_slots.append(len(self.classes))
+                self.classes.append(None)
+                stack.append((node, True))
+            elif kind == 'call_expression':
+                callee = node.child_by_field_name('function')
+                if self._frames and callee is not None and callee.type == 'identifier':
+                    self._frames[-1].calls[_ts_text(callee)] = None
+            elif kind in _TS_BRANCH_NODES:
+                if self._frames:
+                    self._frames[-1].complexity += 1
+            elif kind == 'binary_expression':
+                operator = node.child_by_field_name('operator')
+                if self._frames and operator is not None and operator.type in _TS_LOGICAL_OPERATORS:
+                    self._frames[-1].complexity += 1
+            elif kind == 'import_statement':
+                self._add_import(node)
+                continue
+            elif kind == 'export_statement':
+                self._add_exports(node)
+            elif kind in ('interface_declaration', 'type_alias_declaration'):
+                name = node.child_by_field_name('name')
+                if name is not None:
+                    self.interfaces.append({
+                        'name': _ts_text(name),
+                        'line': node.start_point[0] + 1,
+                        'type': 'interface' if kind == 'interface_declaration' else 'type'
+                    })
+            
+            stack.extend((child, False) for child in reversed(node.children))
+    
+    def _leave_function(self, node) -> None:
+        frame = self._frames.pop()
+        slot = self._function_slots.pop()
+        if self._frames:
+            parent = self._frames[-1]
+            parent.calls.update(frame.calls)
+            parent.complexity += frame.complexity - 1
+        
+        if slot is None and node.type != 'method_definition':
+            return  # Anonymous callbacks only contribute to their enclosing function
+        
+        modifiers = {child.type for child in node.children}
+        visibility = "public"
+        if 'accessibility_modifier' in modifiers:
+            for child in node.children:
+                if child.type == 'accessibility_modifier':
+                    visibility = _ts_text(child)
+        
+        fields = dict(
+            name=self._function_name(node),
+            start_line=node.start_point[0] + 1,
+            end_line=node.end_point[0] + 1,
+            parameters=self._parameters(node),
+            return_type=None,
+            docstring=None,
+            calls=list(frame.calls),
+            complexity=_complexity_label(frame.complexity),
+            is_async='async' in modifiers,
+            is_static='static' in modifiers,
+            visibility=visibility
+        )
+        
+        if node.type == 'method_definition':
+            if self._class_methods and node.parent is not None and node.parent.type == 'class_body':
+                self._class_methods[-1].append(CodeFunction(**fields))
+        else:
+            self.functions.set(slot, **fields)
+    
+    def _leave_class(self, node) -> None:
+        methods = self._class_methods.pop()
+        inherits_from = []
+        implements = []
+        
+        for child in node.children:
+            if child.type != 'class_heritage':
+                continue
+            for clause in child.named_children:
+                if clause.type == 'extends_clause':
+                    inherits_from.extend(_ts_text(c) for c in clause.named_children if c.type != 'type_arguments')
+                elif clause.type == 'implements_clause':
+                    implements.extend(_ts_text(c) for c in clause.named_children)
+                else:  # JavaScript grammar: the heritage holds the base expression directly
+                    inherits_from.append(_ts_text(clause))
+        
+        name = node.child_by_field_name('name')
+        self.classes[self._class_slots.pop()] = CodeClass(
+            name=_ts_text(name) if name is not None else '',
+            start_line=node.start_point[0] + 1,
+            end_line=node.end_point[0] + 1,
+            methods=methods,
+            properties=[],
+            inherits_from=inherits_from,
+            implements=implements,
+            docstring=None,
+            is_abstract=node.type == 'abstract_class_declaration'
+        )
+    
+    @staticmethod
+    def _function_name(node) -> Optional[str]:
+        name = node.child_by_field_name('name')
+        if name is not None:
+            return _ts_text(name)
+        # const foo = () => {} / const foo = function () {}
+        parent = node.parent
+        if parent is not None and parent.type == 'variable_declarator':
+            target = parent.child_by_field_name('name')
+            if target is not None and target.type == 'identifier':
+                return _ts_text(target)
+        return None
+    
+    @staticmethod
+    def _parameters(node) -> List[str]:
+        params = node.child_by_field_name('parameters')
+        if params is None:
+            single = node.child_by_field_name('parameter')  # x => ...
+            return [_ts_text(single)] if single is not None else []
+        
+        names = []
+        for param in params.named_children:
+            if param.type in ('required_parameter', 'optional_parameter'):
+                param = param.child_by_field_name('pattern') or param
+            elif param.type == 'assignment_pattern':
+                param = param.child_by_field_name('left') or param
+            elif param.type == 'comment':
+                continue
+            names.append(_ts_text(param))
+        return names
+    
+    def _add_import(self, node) -> None:
+        source = node.child_by_field_name('source')
+        if source is None:
+            return
+        module = _ts_text(source).strip('\'"`')
+        
+        items = []
+        for child in node.named_children:
+            if child.type != 'import_clause':
+                continue
+            for part in child.named_children:
+                if part.type == 'identifier':  # Default import
+                    items.append(_ts_text(part))
+                elif part.type == 'namespace_import':
+                    items.extend(_ts_text(c) for c in part.named_children if c.type == 'identifier')
+                elif part.type == 'named_imports':
+                    for spec in part.named_children:
+                        name = spec.child_by_field_name('name')
+                        if name is not None:
+                            items.append(_ts_text(name))
+        
+        self.imports.append(CodeImport(
+            module=module,
+            items=items,
+            alias=None,
+            is_relative=module.startswith('.'),
+            line_number=node.start_point[0] + 1
+        ))
+    
+    def _add_exports(self, node) -> None:
+        declaration = node.child_by_field_name('declaration')
+        if declaration is not None:
+            if declaration.type in ('lexical_declaration', 'variable_declaration'):
+                for declarator in declaration.named_children:
+                    name = declarator.child_by_field_name('name')
+                    if declarator.type == 'variable_declarator' and name is not None:
+                        self.exports.append(_ts_text(name))
+            else:
+                name = declaration.child_by_field_name('name')
+                if name is not None:
+                    self.exports.append(_ts_text(name))
+            return
+        
+        for child in node.named_children:
+            if child.type == 'export_clause':
+                for spec in child.named_children:
+                    name = spec.child_by_field_name('name')
+                    if name is not None:
+                        self.exports.append(_ts_text(name))
+
+
+def _intern_names(structure: CodeStructure) -> CodeStructure:
+    """
+    Re-intern identifier strings of a structure that came out of a pickle.
+    
+    Analyzers intern parameter, call and import names, but unpickling (from
+    the cache or a pool worker) creates fresh copies per file; this folds
+    them back onto one shared object per name across the whole project.
+    """
+    intern = sys.intern
+    functions = structure.functions
+    functions.parameters = [[intern(p) for p in params] for params in functions.parameters]
+    functions.calls = [[intern(c) for c in calls] for calls in functions.calls]
+    for cls in structure.classes:
+        for method in cls.methods:
+            method.parameters = [intern(p) for p in method.parameters]
+            method.calls = [intern(c) for c in method.calls]
+    for imp in structure.imports:
+        imp.items = [intern(item) for item in imp.items]
+    return structure
+
+
+class _AnalysisCache:
+    """
+    SQLite-backed store of analyzed files keyed by path and content hash.
+    
+    One row per path: a changed file overwrites its previous entry, so the
+    cache never grows beyond the set of files that have been analyzed.
+    """
+    
+    # Bump whenever the pickled records or what analyzers extract change; older rows are dropped
+    SCHEMA_VERSION = 6
+    
+    def __init__(self, cache_path: str):
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS analysis")
+            self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis (path TEXT PRIMARY KEY, hash BLOB NOT NULL, blob BLOB NOT NULL)"
+        )
+        self._conn.commit()
+        self._batching = False
+    
+    def get(self, file_path: str, digest: bytes) -> Optional[CodeStructure]:
+        row = self._conn.execute(
+            "SELECT hash, blob FROM analysis WHERE path = ?", (file_path,)
+        ).fetchone()
+        if row is None or row[0] != digest:
+            return None
+        return _intern_names(pickle.loads(row[1]))
+    
+    def put(self, file_path: str, digest: bytes, structure: CodeStructure) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO analysis (path, hash, blob) VALUES (?, ?, ?)",
+            (file_path, digest, pickle.dumps(structure, pickle.HIGHEST_PROTOCOL))
+        )
+        if not self._batching:
+            self._conn.commit()
+    
+    @contextmanager
+    def batch(self):
+        """Group puts into a single transaction (one fsync for a whole project)"""
+        self._batching = True
+        try:
+            yield
+        finally:
+            self._batching = False
+            self._conn.commit()
+    
+    def close(self) -> None:
+        self._conn.close()
+
+
+# Below this many uncached files a process pool costs more to start than it saves
+PARALLEL_MIN_FILES = 8
+
+# Concurrent file reads in analyze_paths_async
+READ_CONCURRENCY = 16
+
+_ANALYZERS = {
+    ProgrammingLanguage.PYTHON: PythonAnalyzer,
+    ProgrammingLanguage.TYPESCRIPT: TypeScriptAnalyzer,
+    ProgrammingLanguage.JAVASCRIPT: TypeScriptAnalyzer,  # Use same analyzer
+}
+
+
+def _minimal_structure(file_path: str, content: str, language: ProgrammingLanguage) -> CodeStructure:
+    """Empty structure for unsupported languages and failed analyses"""
+    return CodeStructure(
+        file_path=file_path,
+        language=language,
+        functions=FunctionTable(),
+        classes=[],
+        imports=[],
+        exports=[],
+        variables=[],
+        interfaces=[],
+        types=[],
+        total_lines=content.count('\n') + 1,
+        complexity_score=0,
+        entry_points=[]
+    )
+
+
+def _read_source(file_path: str) -> str:
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+def _analyze_source(file_path: str, content: str, language: ProgrammingLanguage) -> CodeStructure:
+    """Run the language-specific analyzer (module level so worker processes can pickle it)"""
+    try:
+        return _ANALYZERS[language].analyze(content, file_path)
+    except Exception as e:
+        logger.error(f"Error analyzing file {file_path}: {str(e)}")
+        return _minimal_structure(file_path, content, ProgrammingLanguage.UNKNOWN)
+
+
 class MultiLanguageCodeAnalyzer:
     """Main analyzer that coordinates language-specific analyzers"""
     
-    def __init__(self):
+    def __init__(self, cache_path: Optional[str] = None):
+        """
+        Initialize the analyzer.
+        
+        Args:
+            cache_path: SQLite file for caching results across runs; no caching if None
+        """
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
-        self.analyzers = {
-            ProgrammingLanguage.PYTHON: PythonAnalyzer,
-            ProgrammingLanguage.TYPESCRIPT: TypeScriptAnalyzer,
-            ProgrammingLanguage.JAVASCRIPT: TypeScriptAnalyzer,  # Use same analyzer
-        }
+        self.analyzers = _ANALYZERS
+        self._cache = _AnalysisCache(cache_path) if cache_path else None
     
     def analyze_file(self, file_path: str, content: str) -> CodeStructure:
         """Analyze a single file and return its code structure"""
@@ -457,52 +1095,132 @@ class MultiLanguageCodeAnalyzer:
             
             self.logger.debug(f"Analyzing {file_path} as {language.value}")
             
-            # Use specialized analyzer if available
-            if language in self.analyzers:
-                analyzer = self.analyzers[language]
-                return analyzer.analyze(content, file_path)
-            
             # Return minimal structure for unsupported languages
-            return CodeStructure(
-                file_path=file_path,
-                language=language,
-                functions=[],
-                classes=[],
-                imports=[],
-                exports=[],
-                variables=[],
-                interfaces=[],
-                types=[],
-                total_lines=len(content.split('\n')),
-                complexity_score=0,
-                entry_points=[]
-            )
+            if language not in self.analyzers:
+                return _minimal_structure(file_path, content, language)
+            
+            if self._cache is None:
+                return _analyze_source(file_path, content, language)
+            
+            digest = self._digest(content)
+            structure = self._cache.get(file_path, digest)
+            if structure is None:
+                structure = _analyze_source(file_path, content, language)
+                self._cache.put(file_path, digest, structure)
+            return structure
             
         except Exception as e:
             self.logger.error(f"Error analyzing file {file_path}: {str(e)}")
             
             # Return minimal structure on error
-            return CodeStructure(
-                file_path=file_path,
-                language=ProgrammingLanguage.UNKNOWN,
-                functions=[],
-                classes=[],
-                imports=[],
-                exports=[],
-                variables=[],
-                interfaces=[],
-                types=[],
-                total_lines=len(content.split('\n')),
-                complexity_score=0,
-                entry_points=[]
-            )
+            return _minimal_structure(file_path, content, ProgrammingLanguage.UNKNOWN)
     
     def analyze_project(self, files: Dict[str, str]) -> Dict[str, CodeStructure]:
         """Analyze multiple files and return project structure"""
         project_structure = {}
+        pending = []  # (file_path, content, language, digest) still to analyze
+        
+        with self._cache.batch() if self._cache else nullcontext():
+            for file_path, content in files.items():
+                language = LanguageDetector.detect_language(file_path, content)
+                if language not in self.analyzers:
+                    project_structure[file_path] = self.analyze_file(file_path, content)
+                    continue
+                
+                digest = None
+                if self._cache is not None:
+                    digest = self._digest(content)
+                    cached = self._cache.get(file_path, digest)
+                    if cached is not None:
+                        project_structure[file_path] = cached
+                        continue
+                
+                project_structure[file_path] = None  # Keeps input order, filled in below
+                pending.append((file_path, content, language, digest))
+            
+            for (file_path, _, _, digest), structure in zip(pending, self._analyze_pending(pending)):
+                project_structure[file_path] = structure
+                if digest is not None:
+                    self._cache.put(file_path, digest, structure)
+        
+        return project_structure
+    
+    def analyze_paths(self, paths: List[str]) -> Dict[str, CodeStructure]:
+        """Read and analyze files from disk (blocking wrapper around analyze_paths_async)"""
+        return asyncio.run(self.analyze_paths_async(paths))
+    
+    async def analyze_paths_async(self, paths: List[str]) -> Dict[str, CodeStructure]:
+        """
+        Read files from disk and analyze them, overlapping I/O with parsing.
+        
+        Reads run on threads; each file is handed to the process pool as soon
+        as its content arrives, so wall-clock is roughly max(I/O, CPU) rather
+        than their sum. Unreadable files are logged and left out of the result.
+        """
+        loop = asyncio.get_running_loop()
+        workers = os.cpu_count() or 1
+        executor = ProcessPoolExecutor(max_workers=workers) if workers >= 2 and len(paths) >= PARALLEL_MIN_FILES else None
+        read_slots = asyncio.Semaphore(READ_CONCURRENCY)
+        project_structure = {file_path: None for file_path in paths}  # Keeps input order
         
-        for file_path, content in files.items():
-            structure = self.analyze_file(file_path, content)
+        async def process(file_path: str) -> None:
+            async with read_slots:
+                try:
+                    content = await asyncio.to_thread(_read_source, file_path)
+                except OSError as e:
+                    self.logger.warning(f"Failed to read {file_path}: {e}")
+                    del project_structure[file_path]
+                    return
+            
+            language = LanguageDetector.detect_language(file_path, content)
+            if language not in self.analyzers:
+                project_structure[file_path] = _minimal_structure(file_path, content, language)
+                return
+            
+            digest = None
+            if self._cache is not None:
+                digest = self._digest(content)
+                cached = self._cache.get(file_path, digest)
+                if cached is not None:
+                    project_structure[file_path] = cached
+                    return
+            
+            if executor is None:
+                structure = _analyze_source(file_path, content, language)
+            else:
+                structure = _intern_names(await loop.run_in_executor(executor, _analyze_source, file_path, content, language))
             project_structure[file_path] = structure
+            if digest is not None:
+                self._cache.put(file_path, digest, structure)
+        
+        try:
+            with self._cache.batch() if self._cache else nullcontext():
+                await asyncio.gather(*(process(file_path) for file_path in paths))
+        finally:
+            if executor is not None:
+                executor.shutdown()
         
-        return project_structure
\ No newline at end of file
+        return project_structure
+    
+    def _analyze_pending(self, pending: List[Tuple[str, str, ProgrammingLanguage, Optional[bytes]]]) -> List[CodeStructure]:
+        """Analyze files, fanning out to a process pool when there are enough of them"""
+        workers = os.cpu_count() or 1
+        if workers < 2 or len(pending) < PARALLEL_MIN_FILES:
+            return [_analyze_source(path, content, language) for path, content, language, _ in pending]
+        
+        paths, contents, languages, _ = zip(*pending)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return [_intern_names(structure) for structure in executor.map(
+                _analyze_source, paths, contents, languages,
+                chunksize=max(1, len(pending) // (4 * workers))
+            )]
+    
+    @staticmethod
+    def _digest(content: str) -> bytes:
+        return hashlib.sha256(content.encode('utf-8', 'surrogatepass')).digest()
+    
+    def close(self) -> None:
+        """Close the analysis cache, if one is open"""
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
\ No newline at end of file
@@ -6,8 +6,54 @@ for gitingest integration configuration.
 """
 
 import os
+import re
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
 from typing import List, Optional
 from dataclasses import dataclass
+from functools import lru_cache
+
+
+# Environment variables read by GitingestConfig.from_environment
+_CONFIG_ENV_VARS = (
+    'GITINGEST_MAX_FILE_SIZE',
+    'GITINGEST_TIMEOUT',
+    'GITINGEST_TEMP_DIR',
+    'GITINGEST_INCLUDE_PATTERNS',
+    'GITINGEST_EXCLUDE_PATTERNS',
+)
+_CONFIG_ENV_DEFAULTS = (
+    '10485760',  # 10MB default
+    '300',  # 5 minutes default
+    '/tmp/gitingest',
+    '*.py,*.js,*.ts,*.jsx,*.tsx,*.md,*.json,*.yaml,*.yml',
+    'node_modules,__pycache__,.git,*.pyc,*.log',
+)
+
+_PATTERN_SPLIT_RE = re.compile(r'\s*,\s*')
+
+
+def _split_patterns(patterns_str: str) -> tuple:
+    """Split a comma-separated pattern list, dropping blanks"""
+    return tuple(p for p in _PATTERN_SPLIT_RE.split(patterns_str.strip()) if p)
+
+
+@lru_cache(maxsize=1)
+def _parse_environment(env: tuple) -> tuple:
+    """Parse the config env vars; memoized on their current values"""
+    max_file_size, timeout, temp_dir, include_patterns_str, exclude_patterns_str = (
+        default if value is None else value
+        for value, default in zip(env, _CONFIG_ENV_DEFAULTS)
+    )
+    return (
+        int(max_file_size),
+        int(timeout),
+        temp_dir,
+        _split_patterns(include_patterns_str),
+        _split_patterns(exclude_patterns_str),
+    )
 
 
 @dataclass
@@ -28,30 +74,18 @@ class GitingestConfig:
         Returns:
             GitingestConfig instance with values from environment or defaults
         """
-        # Load with defaults
-        max_file_size = int(os.getenv('GITINGEST_MAX_FILE_SIZE', '10485760'))  # 10MB default
-        timeout = int(os.getenv('GITINGEST_TIMEOUT', '300'))  # 5 minutes default
-        temp_dir = os.getenv('GITINGEST_TEMP_DIR', '/tmp/gitingest')
-        
-        # Parse comma-separated patterns
-        include_patterns_str = os.getenv(
-            'GITINGEST_INCLUDE_PATTERNS', 
-            '*.py,*.js,*.ts,*.jsx,*.tsx,*.md,*.json,*.yaml,*.yml'
+        # Parsing is memoized on the env values; each call still gets its own
+        # instance since callers (e.g. setup_gitingest_environment) mutate it
+        max_file_size, timeout, temp_dir, include_patterns, exclude_patterns = _parse_environment(
+            tuple(os.environ.get(var) for var in _CONFIG_ENV_VARS)
         )
-        include_patterns = [p.strip() for p in include_patterns_str.split(',') if p.strip()]
-        
-        exclude_patterns_str = os.getenv(
-            'GITINGEST_EXCLUDE_PATTERNS',
-            'node_modules,__pycache__,.git,*.pyc,*.log'
-        )
-        exclude_patterns = [p.strip() for p in exclude_patterns_str.split(',') if p.strip()]
         
         return cls(
             max_file_size=max_file_size,
             timeout=timeout,
             temp_dir=temp_dir,
-            include_patterns=include_patterns,
-            exclude_patterns=exclude_patterns
+            include_patterns=list(include_patterns),
+            exclude_patterns=list(exclude_patterns)
         )
     
     def validate(self) -> List[str]:
@@ -115,6 +149,18 @@ def load_gitingest_config() -> GitingestConfig:
     return config
 
 
+# Check common environment variable names for GitHub token
+# Prioritize the one already used in your app
+_TOKEN_VARS = (
+    'GITHUB_API_TOKEN',  # Your existing token variable
+    'GITHUB_TOKEN',
+    'GITHUB_ACCESS_TOKEN',
+    'GH_TOKEN',
+    'PERSONAL_ACCESS_TOKEN',
+)
+_TOKEN_PLACEHOLDER = 'your_github_token_here'
+
+
 def get_github_token() -> Optional[str]:
     """
     Get GitHub token from environment variables.
@@ -124,33 +170,44 @@ def get_github_token() -> Optional[str]:
     Returns:
         GitHub token if found, None otherwise
     """
-    # Check common environment variable names for GitHub token
-    # Prioritize the one already used in your app
-    token_vars = [
-        'GITHUB_API_TOKEN',  # Your existing token variable
-        'GITHUB_TOKEN',
-        'GITHUB_ACCESS_TOKEN', 
-        'GH_TOKEN',
-        'PERSONAL_ACCESS_TOKEN'
-    ]
-    
-    for var in token_vars:
-        token = os.getenv(var)
-        if token and token != 'your_github_token_here':  # Skip placeholder values
+    env = os.environ
+    for var in _TOKEN_VARS:
+        token = env.get(var)
+        if token and token != _TOKEN_PLACEHOLDER:  # Skip placeholder values
             return token
     
     return None
 
 
+@lru_cache(maxsize=None)
+def _gitingest_error() -> Optional[str]:
+    """
+    Check once per process that the gitingest CLI runs.
+    
+    Returns:
+        Error message if gitingest is unusable, None otherwise
+    """
+    # PATH lookup is cheap; only fork the CLI when the binary is actually there
+    if shutil.which('gitingest') is None:
+        return "Gitingest is not installed or not accessible in PATH"
+    
+    try:
+        result = subprocess.run(['gitingest', '--version'], 
+                              capture_output=True, text=True, timeout=10)
+        if result.returncode != 0:
+            return "Gitingest command failed"
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return "Gitingest is not installed or not accessible in PATH"
+    
+    return None
+
+
 def setup_gitingest_environment() -> None:
     """
     Set up environment for gitingest processing.
     
     Creates necessary directories and validates configuration.
     """
-    import tempfile
-    from pathlib import Path
-    
     config = load_gitingest_config()
     
     # Create temp directory if it doesn't exist
@@ -163,11 +220,6 @@ def setup_gitingest_environment() -> None:
             config.temp_dir = tempfile.gettempdir()
     
     # Validate gitingest is available
-    import subprocess
-    try:
-        result = subprocess.run(['gitingest', '--version'], 
-                              capture_output=True, text=True, timeout=10)
-        if result.returncode != 0:
-            raise RuntimeError("Gitingest command failed")
-    except (FileNotFoundError, subprocess.TimeoutExpired):
-        raise RuntimeError("Gitingest is not installed or not accessible in PATH")
\ No newline at end of file
+    error = _gitingest_error()
+    if error is not None:
+        raise RuntimeError(error)
\ No newline at end of file
@@ -7,27 +7,45 @@ text format generation.
 """
 
 import os
-import subprocess
+import re
+import mmap
+import signal
+import asyncio
 import tempfile
 import logging
-from pathlib import Path
-from typing import Dict, List, Optional, Any
+import time
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 import json
 import shutil
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logging.info("orjson not available, using json for StructuredRepository.to_json")
+
 logger = logging.getLogger(__name__)
 
+# Supported Git URL formats (prefix match, so paths like /tree/main are accepted)
+_REPO_URL_RE = re.compile(
+    r'https://github\.com/[\w\-\.]+/[\w\-\.]+'
+    r'|git@github\.com:[\w\-\.]+/[\w\-\.]+\.git'
+    r'|https://gitlab\.com/[\w\-\.]+/[\w\-\.]+'
+    r'|https://bitbucket\.org/[\w\-\.]+/[\w\-\.]+'
+)
+
 
-@dataclass
+@dataclass(slots=True)
 class AuthConfig:
     """Configuration for repository authentication"""
     token: Optional[str] = None
     auth_method: str = "token"  # token, ssh, https
     
 
-@dataclass
+@dataclass(slots=True)
 class ProcessingConfig:
     """Configuration for gitingest processing"""
     include_patterns: List[str] = None
@@ -36,6 +54,7 @@ class ProcessingConfig:
     respect_gitignore: bool = True
     include_binary_files: bool = False
     timeout: int = 300  # 5 minutes default
+    keep_raw_output: bool = False  # Also keep the full digest text on StructuredRepository
     
     def __post_init__(self):
         if self.include_patterns is None:
@@ -44,7 +63,7 @@ class ProcessingConfig:
             self.exclude_patterns = ["node_modules", "__pycache__", ".git", "*.pyc", "*.log"]
 
 
-@dataclass
+@dataclass(slots=True)
 class GitingestMetadata:
     """Metadata from gitingest processing"""
     processing_time: float
@@ -54,7 +73,7 @@ class GitingestMetadata:
     processed_at: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ContentBlock:
     """Represents a content block from gitingest output"""
     file_path: str
@@ -65,18 +84,77 @@ class ContentBlock:
     file_type: str
 
 
-@dataclass
+@dataclass(slots=True)
 class StructuredRepository:
     """Structured representation of repository from gitingest"""
     repo_url: str
     files: Dict[str, ContentBlock]
-    file_hierarchy: Dict[str, Any]
+    file_hierarchy: List[Tuple[int, str, bool]]  # (depth, name, is_dir), depth-first as in the gitingest tree
     language_stats: Dict[str, int]
     gitingest_metadata: GitingestMetadata
-    raw_output: str
+    raw_output: Optional[str] = None  # Only kept when ProcessingConfig.keep_raw_output is set
+    
+    def to_json(self) -> bytes:
+        """
+        Serialize to UTF-8 encoded JSON.
+        
+        Uses orjson when installed; file contents are by far the bulk of the
+        output and orjson encodes them straight to UTF-8 without the escaping
+        and re-encoding pass of json.dumps.
+        """
+        data = {
+            'repo_url': self.repo_url,
+            'files': {
+                path: {
+                    'content': block.content,
+                    'language': block.language,
+                    'line_count': block.line_count,
+                    'size_bytes': block.size_bytes,
+                    'file_type': block.file_type
+                }
+                for path, block in self.files.items()
+            },
+            'file_hierarchy': self.file_hierarchy,
+            'language_stats': self.language_stats,
+            'gitingest_metadata': {
+                'processing_time': self.gitingest_metadata.processing_time,
+                'total_files': self.gitingest_metadata.total_files,
+                'total_size': self.gitingest_metadata.total_size,
+                'gitingest_version': self.gitingest_metadata.gitingest_version,
+                'processed_at': self.gitingest_metadata.processed_at
+            }
+        }
+        if self.raw_output is not None:
+            data['raw_output'] = self.raw_output
+        
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(data)
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+    
+    def nested_hierarchy(self) -> Dict[str, Any]:
+        """
+        Expand file_hierarchy into nested dicts.
+        
+        Returns:
+            Directory name -> dict of its entries; files map to their path
+        """
+        root: Dict[str, Any] = {}
+        stack = [root]  # stack[d] holds the entries at depth d
+        path = []
+        for depth, name, is_dir in self.file_hierarchy:
+            del stack[depth + 1:]
+            del path[depth:]
+            parent = stack[-1]
+            if is_dir:
+                parent[name] = {}
+                stack.append(parent[name])
+                path.append(name)
+            else:
+                parent[name] = '/'.join(path + [name])
+        return root
 
 
-@dataclass
+@dataclass(slots=True)
 class ValidationResult:
     """Result of repository validation"""
     valid: bool
@@ -84,7 +162,7 @@ class ValidationResult:
     repo_info: Optional[Dict[str, Any]] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class GitingestOutput:
     """Complete output from gitingest processing"""
     success: bool
@@ -93,6 +171,99 @@ class GitingestOutput:
     processing_stats: Optional[Dict[str, Any]] = None
 
 
+_LANGUAGE_MAP = {
+    '.py': 'Python',
+    '.js': 'JavaScript',
+    '.ts': 'TypeScript',
+    '.jsx': 'JavaScript',
+    '.tsx': 'TypeScript',
+    '.java': 'Java',
+    '.cpp': 'C++',
+    '.c': 'C',
+    '.cs': 'C#',
+    '.go': 'Go',
+    '.rs': 'Rust',
+    '.php': 'PHP',
+    '.rb': 'Ruby',
+    '.swift': 'Swift',
+    '.kt': 'Kotlin',
+    '.scala': 'Scala',
+    '.html': 'HTML',
+    '.css': 'CSS',
+    '.scss': 'SCSS',
+    '.md': 'Markdown',
+    '.json': 'JSON',
+    '.yaml': 'YAML',
+    '.yml': 'YAML',
+    '.xml': 'XML',
+    '.sql': 'SQL',
+    '.sh': 'Shell',
+    '.bash': 'Shell',
+    '.ps1': 'PowerShell'
+}
+
+# Extension -> file type category (the categories don't overlap, so one lookup suffices)
+_FILE_TYPE_MAP = {
+    ext: file_type
+    for file_type, exts in (
+        ('source', ('.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cpp', '.c', '.cs', '.go', '.rs', '.php', '.rb', '.swift', '.kt', '.scala')),
+        ('documentation', ('.md', '.txt', '.rst', '.doc', '.docx')),
+        ('configuration', ('.json', '.yaml', '.yml', '.xml', '.toml', '.ini', '.cfg')),
+        ('web', ('.html', '.css', '.scss', '.less')),
+        ('database', ('.sql',)),
+        ('script', ('.sh', '.bash', '.ps1', '.bat')),
+    )
+    for ext in exts
+}
+
+# Extension -> (language, file type), so each file needs one suffix parse and one lookup
+_EXT_INFO = {
+    ext: (_LANGUAGE_MAP.get(ext), _FILE_TYPE_MAP.get(ext, 'other'))
+    for ext in _LANGUAGE_MAP.keys() | _FILE_TYPE_MAP.keys()
+}
+_NO_EXT_INFO = (None, 'other')
+
+
+def _suffix(file_path: str) -> str:
+    """Lowercased extension, same as Path(file_path).suffix.lower() without building a Path"""
+    name = file_path.rstrip('/').rpartition('/')[2]
+    dot = name.rfind('.')
+    if 0 < dot < len(name) - 1:
+        return name[dot:].lower()
+    return ''
+
+
+# Structural markers of a gitingest digest, matched on the raw UTF-8 buffer
+_FILE_HEADER = b'FILE: '
+_TREE_HEADER = b'Directory structure:'
+
+# Directory tree entry, e.g. "│   └── README" or "└── octocat-hello-world/";
+# group 1 is the branch marker (its offset gives the depth), group 2 the name
+_TREE_LINE_RE = re.compile(r'[│\s]*([└├])──\s*(.*?)\s*$')
+
+
+def _find_line(buf, prefix: bytes, start: int) -> int:
+    """Offset of the first line at or after start (a line start) that begins with prefix, or -1"""
+    if start == 0 and buf[:len(prefix)] == prefix:
+        return 0
+    pos = buf.find(b'\n' + prefix, max(start - 1, 0))
+    return pos + 1 if pos >= 0 else -1
+
+
+def _line_end(buf, start: int) -> int:
+    """Offset of the newline ending the line at start (len(buf) for the last line)"""
+    pos = buf.find(b'\n', start)
+    return pos if pos >= 0 else len(buf)
+
+
+def _utf8_size(text: str) -> int:
+    """UTF-8 byte length of text, skipping the encode for pure-ASCII strings"""
+    # str.isascii() reads a flag CPython keeps on the string, so it's O(1)
+    if text.isascii():
+        return len(text)
+    return len(text.encode('utf-8'))
+
+
 class GitingestProcessor:
     """
     Core service that handles gitingest execution and output processing.
@@ -112,7 +283,6 @@ class GitingestProcessor:
             config: Processing configuration, uses defaults if None
         """
         self.config = config or ProcessingConfig()
-        self.temp_dir = None
         self._setup_logging()
     
     def _setup_logging(self):
@@ -131,7 +301,9 @@ class GitingestProcessor:
             GitingestOutput containing structured repository data or error information
         """
         start_time = datetime.now()
+        start_clock = time.monotonic()  # Durations come from the monotonic clock, immune to NTP/DST jumps
         process_id = None
+        temp_dir = None
         
         try:
             self.logger.info(f"Starting gitingest processing for repository: {repo_url}")
@@ -145,20 +317,21 @@ class GitingestProcessor:
                 )
             
             # Create temporary directory for processing
-            process_id = self._create_temp_directory()
+            process_id, temp_dir = self._create_temp_directory()
             
             # Execute gitingest command
-            raw_output = await self._execute_gitingest(repo_url, auth_config, process_id)
+            output_file = await self._execute_gitingest(repo_url, auth_config, temp_dir)
             
-            # Parse gitingest output
-            structured_repo = self.parse_gitingest_output(raw_output, repo_url)
+            # Parse gitingest output straight from disk
+            structured_repo = self.parse_gitingest_file(output_file, repo_url)
             
             # Calculate processing stats
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.monotonic() - start_clock
+            structured_repo.gitingest_metadata.processing_time = processing_time
             processing_stats = {
                 'processing_time_seconds': processing_time,
                 'files_processed': len(structured_repo.files),
-                'total_size_bytes': sum(block.size_bytes for block in structured_repo.files.values()),
+                'total_size_bytes': structured_repo.gitingest_metadata.total_size,
                 'started_at': start_time.isoformat(),
                 'completed_at': datetime.now().isoformat()
             }
@@ -178,9 +351,29 @@ class GitingestProcessor:
                 error=f"Processing failed: {str(e)}"
             )
         finally:
-            # Always cleanup temporary files
+            # Always cleanup temporary files (on a worker thread so the event loop keeps running)
             if process_id:
-                self.cleanup_temporary_files(process_id)
+                await asyncio.to_thread(self.cleanup_temporary_files, process_id, temp_dir)
+    
+    async def process_repositories(self, repos: List[Tuple[str, AuthConfig]],
+                                   concurrency: int = 8) -> List[GitingestOutput]:
+        """
+        Process several repositories concurrently.
+        
+        Args:
+            repos: (repo_url, auth_config) pairs to process
+            concurrency: Maximum number of gitingest runs in flight at once
+            
+        Returns:
+            GitingestOutput per repository, in the same order as repos
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def process_one(repo_url: str, auth_config: AuthConfig) -> GitingestOutput:
+            async with semaphore:
+                return await self.process_repository(repo_url, auth_config)
+        
+        return await asyncio.gather(*(process_one(url, auth) for url, auth in repos))
     
     async def validate_repository(self, repo_url: str) -> ValidationResult:
         """
@@ -198,15 +391,7 @@ class GitingestProcessor:
                 return ValidationResult(valid=False, error="Invalid repository URL")
             
             # Check if it's a valid Git URL format
-            valid_patterns = [
-                r'https://github\.com/[\w\-\.]+/[\w\-\.]+',
-                r'git@github\.com:[\w\-\.]+/[\w\-\.]+\.git',
-                r'https://gitlab\.com/[\w\-\.]+/[\w\-\.]+',
-                r'https://bitbucket\.org/[\w\-\.]+/[\w\-\.]+',
-            ]
-            
-            import re
-            is_valid_format = any(re.match(pattern, repo_url) for pattern in valid_patterns)
+            is_valid_format = _REPO_URL_RE.match(repo_url) is not None
             
             if not is_valid_format:
                 return ValidationResult(
@@ -239,52 +424,79 @@ class GitingestProcessor:
         Returns:
             StructuredRepository with parsed and structured data
         """
+        buf = raw_output.encode('utf-8', 'surrogatepass')
+        kept_output = raw_output if self.config.keep_raw_output else None
+        return self._parse_buffer(buf, repo_url, kept_output, 'surrogatepass', translate_newlines=False)
+    
+    def parse_gitingest_file(self, output_path: str, repo_url: str) -> StructuredRepository:
+        """
+        Parse a gitingest output file without loading it into one string.
+        
+        Args:
+            output_path: Path of the file written by gitingest --output
+            repo_url: Original repository URL
+            
+        Returns:
+            StructuredRepository with parsed and structured data
+        """
+        raw_output = None
+        if self.config.keep_raw_output:
+            with open(output_path, 'r', encoding='utf-8', errors='replace') as f:
+                raw_output = f.read()
+        with open(output_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return self._parse_buffer(b'', repo_url, raw_output, 'replace', translate_newlines=True)
+            # Memory-mapped so the OS pages the digest in on demand; each file's content is sliced out once
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return self._parse_buffer(mm, repo_url, raw_output, 'replace', translate_newlines=True)
+    
+    def _parse_buffer(self, buf, repo_url: str, raw_output: Optional[str], errors: str,
+                      translate_newlines: bool) -> StructuredRepository:
+        """
+        Build a StructuredRepository from the raw UTF-8 bytes of a gitingest digest.
+        
+        File headers are located with buffer-level searches and each file's
+        content is decoded from a single slice, so content lines are never
+        materialized one by one.
+        
+        Args:
+            buf: bytes or mmap holding the digest
+            repo_url: Original repository URL
+            raw_output: Digest text to keep on the result, if any
+            errors: Error handler for UTF-8 decoding
+            translate_newlines: Turn CRLF into LF, as reading in text mode would
+        """
         try:
             self.logger.info("Parsing gitingest output into structured format")
             
             # Initialize data structures
             files = {}
-            file_hierarchy = {}
+            file_hierarchy = []
             language_stats = {}
             
-            # Parse the gitingest output
-            # Gitingest format: FILE: filename followed by content
-            lines = raw_output.split('\n')
-            current_file = None
-            current_content = []
-            in_file_section = False
-            
-            for line in lines:
-                # Detect file headers - gitingest uses "FILE: filename" format
-                if line.startswith('FILE: '):
-                    # Save previous file if exists
-                    if current_file and current_content:
-                        self._add_file_to_structure(current_file, current_content, files, language_stats)
-                    
-                    # Start new file
-                    current_file = line.replace('FILE: ', '').strip()
-                    current_content = []
-                    in_file_section = True
-                    
-                elif line.startswith('='):
-                    # Skip separator lines
-                    continue
-                    
-                elif line.startswith('Directory structure:'):
-                    # Skip directory structure section
-                    in_file_section = False
-                    current_file = None
-                    
-                elif in_file_section and current_file:
-                    # Add content line
-                    current_content.append(line)
-            
-            # Add last file
-            if current_file and current_content:
-                self._add_file_to_structure(current_file, current_content, files, language_stats)
-            
-            # Build file hierarchy from the raw output directory structure
-            file_hierarchy = self._parse_directory_structure(raw_output)
+            # Gitingest format: a "Directory structure:" tree, then FILE: filename followed by content
+            tree_start = _find_line(buf, _TREE_HEADER, 0)
+            if tree_start >= 0:
+                tree_end = _find_line(buf, b'=', tree_start)
+                if tree_end < 0:
+                    tree_end = len(buf)
+                self._parse_tree(buf[tree_start:tree_end].decode('utf-8', errors), file_hierarchy)
+            
+            header = _find_line(buf, _FILE_HEADER, 0)
+            while header >= 0:
+                header_end = _line_end(buf, header)
+                file_path = buf[header:header_end].decode('utf-8', errors).replace('FILE: ', '').strip()
+                
+                # Content runs up to the next file header (or the tree, if it follows)
+                next_header = _find_line(buf, _FILE_HEADER, header_end + 1) if header_end < len(buf) else -1
+                end = next_header if next_header >= 0 else len(buf)
+                if header < tree_start < end:
+                    end = tree_start
+                
+                if file_path:
+                    self._add_file_to_structure(file_path, buf, header_end + 1, end, files, language_stats,
+                                                errors, translate_newlines)
+                header = next_header
             
             # Create metadata
             metadata = GitingestMetadata(
@@ -308,44 +520,48 @@ class GitingestProcessor:
             self.logger.error(f"Error parsing gitingest output: {str(e)}")
             raise
     
-    def cleanup_temporary_files(self, process_id: str) -> None:
+    def cleanup_temporary_files(self, process_id: str, temp_dir: Optional[str] = None) -> None:
         """
         Clean up temporary files and directories created during processing.
         
         Args:
             process_id: Unique identifier for the processing session
+            temp_dir: Temporary directory created for that session; defaults to the
+                directory the process ID names (process IDs are mkdtemp basenames)
         """
+        if temp_dir is None and process_id.startswith("gitingest_") and os.path.basename(process_id) == process_id:
+            temp_dir = os.path.join(tempfile.gettempdir(), process_id)
         try:
-            if self.temp_dir and os.path.exists(self.temp_dir):
-                shutil.rmtree(self.temp_dir)
+            if temp_dir and os.path.exists(temp_dir):
+                shutil.rmtree(temp_dir)
                 self.logger.info(f"Cleaned up temporary directory for process {process_id}")
         except Exception as e:
             self.logger.error(f"Error cleaning up temporary files for process {process_id}: {str(e)}")
     
-    def _create_temp_directory(self) -> str:
-        """Create temporary directory for processing and return process ID"""
-        self.temp_dir = tempfile.mkdtemp(prefix="gitingest_")
-        process_id = os.path.basename(self.temp_dir)
-        self.logger.debug(f"Created temporary directory: {self.temp_dir}")
-        return process_id
+    def _create_temp_directory(self) -> Tuple[str, str]:
+        """Create temporary directory for processing and return (process ID, directory path)"""
+        temp_dir = tempfile.mkdtemp(prefix="gitingest_")
+        process_id = os.path.basename(temp_dir)
+        self.logger.debug(f"Created temporary directory: {temp_dir}")
+        return process_id, temp_dir
     
-    async def _execute_gitingest(self, repo_url: str, auth_config: AuthConfig, process_id: str) -> str:
+    async def _execute_gitingest(self, repo_url: str, auth_config: AuthConfig, temp_dir: str) -> str:
         """
         Execute gitingest command with proper authentication and configuration.
         
         Args:
             repo_url: Repository URL to process
             auth_config: Authentication configuration
-            process_id: Process identifier for cleanup
+            temp_dir: Per-call temporary directory that holds the output file
             
         Returns:
-            Raw output from gitingest command
+            Path of the gitingest output file (removed with the temp directory)
         """
         output_file = None
+        succeeded = False
         try:
             # Create temporary output file (Windows encoding workaround)
-            import tempfile
-            output_fd, output_file = tempfile.mkstemp(suffix='.txt', dir=self.temp_dir, text=True)
+            output_fd, output_file = tempfile.mkstemp(suffix='.txt', dir=temp_dir, text=True)
             os.close(output_fd)  # Close the file descriptor, we'll use the path
             
             # Build gitingest command with correct syntax
@@ -382,50 +598,97 @@ class GitingestProcessor:
             # Execute gitingest
             self.logger.debug(f"Executing gitingest command: {' '.join(cmd[:-2])} [URL] --output [temp_file]")
             
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=self.config.timeout,
+            # Run without blocking the event loop so several repositories can be processed concurrently
+            # The digest goes to --output, so only stderr is captured
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
                 env=env,
-                cwd=self.temp_dir,
-                encoding='utf-8',
-                errors='replace'  # Handle encoding errors gracefully
+                cwd=temp_dir,
+                start_new_session=(os.name == 'posix')
             )
-            
-            if result.returncode != 0:
-                error_msg = result.stderr.strip() if result.stderr else "Unknown gitingest error"
+            try:
+                _, stderr = await asyncio.wait_for(proc.communicate(), timeout=self.config.timeout)
+            except asyncio.TimeoutError:
+                # Kill the whole group: git clones spawned by gitingest would otherwise hold stderr open
+                try:
+                    if os.name == 'posix':
+                        os.killpg(proc.pid, signal.SIGKILL)
+                    else:
+                        proc.kill()
+                except ProcessLookupError:
+                    pass  # Already exited; still report the timeout
+                await proc.wait()
+                raise
+            
+            if proc.returncode != 0:
+                stderr = stderr.decode('utf-8', 'replace')  # Handle encoding errors gracefully
+                error_msg = stderr.strip() if stderr else "Unknown gitingest error"
                 raise RuntimeError(f"Gitingest execution failed: {error_msg}")
             
-            # Read the output file
-            with open(output_file, 'r', encoding='utf-8', errors='replace') as f:
-                output_content = f.read()
-            
-            return output_content
+            succeeded = True
+            return output_file
             
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             raise RuntimeError(f"Gitingest execution timed out after {self.config.timeout} seconds")
         except FileNotFoundError:
             raise RuntimeError("Gitingest is not installed or not in PATH")
         except Exception as e:
             raise RuntimeError(f"Gitingest execution failed: {str(e)}")
         finally:
-            # Clean up temporary output file
-            if output_file and os.path.exists(output_file):
+            # Clean up temporary output file if the caller won't be reading it
+            if not succeeded and output_file and os.path.exists(output_file):
                 try:
                     os.remove(output_file)
                 except Exception as e:
                     self.logger.warning(f"Failed to clean up temporary output file {output_file}: {e}")
     
-    def _add_file_to_structure(self, file_path: str, content_lines: List[str], 
-                              files: Dict[str, ContentBlock], language_stats: Dict[str, int]) -> None:
-        """Add a file to the structured repository data"""
-        # Clean up content - remove empty lines at the end
-        while content_lines and not content_lines[-1].strip():
-            content_lines.pop()
+    def _parse_tree(self, tree: str, file_hierarchy: List[Tuple[int, str, bool]]) -> None:
+        """Append the entries of the directory tree section to file_hierarchy"""
+        match = _TREE_LINE_RE.match
+        for line in tree.split('\n'):
+            m = match(line)
+            if m is None:
+                continue
+            name = m.group(2)
+            # Each level is indented by a 4-character "│   " or "    " unit
+            depth = m.start(1) // 4
+            if name.endswith('/'):
+                # Directory
+                file_hierarchy.append((depth, name[:-1], True))
+            else:
+                # File
+                file_hierarchy.append((depth, name, False))
+    
+    def _add_file_to_structure(self, file_path: str, buf, start: int, end: int,
+                              files: Dict[str, ContentBlock], language_stats: Dict[str, int],
+                              errors: str = 'replace', translate_newlines: bool = False) -> None:
+        """Add the file whose section spans buf[start:end] to the structured repository data"""
+        # Skip the separator line(s) right after the header
+        while start < end and buf[start:start + 1] == b'=':
+            start = _line_end(buf, start) + 1
+        if start >= end:
+            return  # No content lines at all
+        
+        # Clean up content - drop the separator before the next header and empty lines at the end
+        # (walking back line by line, so only the trailing lines are looked at)
+        if end > start and buf[end - 1:end] == b'\n':
+            end -= 1
+        while end > start:
+            line_start = buf.rfind(b'\n', start, end) + 1 or start
+            line = buf[line_start:end]
+            if line[:1] != b'=' and line.decode('utf-8', errors).strip():
+                break
+            end = line_start - 1 if line_start > start else start
+        
+        content = buf[start:end].decode('utf-8', errors)
+        if translate_newlines and '\r' in content:
+            content = content.replace('\r\n', '\n')
+            if content.endswith('\r'):
+                content = content[:-1]  # CR of the last kept line's CRLF
         
-        content = '\n'.join(content_lines)
-        language = self._detect_language(file_path)
+        language, file_type = _EXT_INFO.get(_suffix(file_path), _NO_EXT_INFO)
         
         # Update language statistics
         if language:
@@ -436,44 +699,13 @@ class GitingestProcessor:
             file_path=file_path,
             content=content,
             language=language or 'unknown',
-            line_count=len(content_lines),
-            size_bytes=len(content.encode('utf-8')),
-            file_type=self._get_file_type(file_path)
+            line_count=content.count('\n') + 1 if content else 0,
+            size_bytes=_utf8_size(content),
+            file_type=file_type
         )
         
         files[file_path] = content_block
     
-    def _parse_directory_structure(self, raw_output: str) -> Dict[str, Any]:
-        """Parse directory structure from gitingest output"""
-        hierarchy = {}
-        
-        lines = raw_output.split('\n')
-        in_directory_section = False
-        
-        for line in lines:
-            if line.startswith('Directory structure:'):
-                in_directory_section = True
-                continue
-            elif line.startswith('=') and in_directory_section:
-                # End of directory section
-                break
-            elif in_directory_section and line.strip():
-                # Parse directory tree lines
-                # Example: "    └── README" or "└── octocat-hello-world/"
-                if '└──' in line or '├──' in line:
-                    # Extract file/folder name
-                    parts = line.split('──')
-                    if len(parts) > 1:
-                        name = parts[-1].strip()
-                        if name.endswith('/'):
-                            # Directory
-                            hierarchy[name[:-1]] = {}
-                        else:
-                            # File
-                            hierarchy[name] = name
-        
-        return hierarchy
-    
     def _build_file_hierarchy(self, file_paths: List[str]) -> Dict[str, Any]:
         """Build hierarchical structure from file paths"""
         hierarchy = {}
@@ -495,56 +727,8 @@ class GitingestProcessor:
     
     def _detect_language(self, file_path: str) -> Optional[str]:
         """Detect programming language from file extension"""
-        ext = Path(file_path).suffix.lower()
-        
-        language_map = {
-            '.py': 'Python',
-            '.js': 'JavaScript',
-            '.ts': 'TypeScript',
-            '.jsx': 'JavaScript',
-            '.tsx': 'TypeScript',
-            '.java': 'Java',
-            '.cpp': 'C++',
-            '.c': 'C',
-            '.cs': 'C#',
-            '.go': 'Go',
-            '.rs': 'Rust',
-            '.php': 'PHP',
-            '.rb': 'Ruby',
-            '.swift': 'Swift',
-            '.kt': 'Kotlin',
-            '.scala': 'Scala',
-            '.html': 'HTML',
-            '.css': 'CSS',
-            '.scss': 'SCSS',
-            '.md': 'Markdown',
-            '.json': 'JSON',
-            '.yaml': 'YAML',
-            '.yml': 'YAML',
-            '.xml': 'XML',
-            '.sql': 'SQL',
-            '.sh': 'Shell',
-            '.bash': 'Shell',
-            '.ps1': 'PowerShell'
-        }
-        
-        return language_map.get(ext)
+        return _EXT_INFO.get(_suffix(file_path), _NO_EXT_INFO)[0]
     
     def _get_file_type(self, file_path: str) -> str:
         """Determine file type category"""
-        ext = Path(file_path).suffix.lower()
-        
-        if ext in ['.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cpp', '.c', '.cs', '.go', '.rs', '.php', '.rb', '.swift', '.kt', '.scala']:
-            return 'source'
-        elif ext in ['.md', '.txt', '.rst', '.doc', '.docx']:
-            return 'documentation'
-        elif ext in ['.json', '.yaml', '.yml', '.xml', '.toml', '.ini', '.cfg']:
-            return 'configuration'
-        elif ext in ['.html', '.css', '.scss', '.less']:
-            return 'web'
-        elif ext in ['.sql']:
-            return 'database'
-        elif ext in ['.sh', '.bash', '.ps1', '.bat']:
-            return 'script'
-        else:
-            return 'other'
\ No newline at end of file
+        return _EXT_INFO.get(_suffix(file_path), _NO_EXT_INFO)[1]
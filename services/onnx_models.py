@@ -0,0 +1,46 @@
+"""
+Selection of the int8 ONNX export of the embedding model.
+
+The all-MiniLM-L6-v2 model repo ships one dynamically quantized export per
+instruction set; this module picks the one that suits the host CPU. Shared by
+rag_repo.py and services/rag_system.py.
+"""
+
+import os
+import platform
+from functools import lru_cache
+
+
+# Dynamic int8 exports shipped with the model repo, each tuned for one instruction set;
+# EMBED_ONNX_FILE in the environment overrides the pick
+EMBEDDING_ONNX_FILES = {
+    'avx512_vnni': 'onnx/model_qint8_avx512_vnni.onnx',
+    'avx512': 'onnx/model_qint8_avx512.onnx',
+    'avx2': 'onnx/model_quint8_avx2.onnx',
+    'arm64': 'onnx/model_qint8_arm64.onnx',
+}
+
+
+@lru_cache(maxsize=1)
+def pick_onnx_file() -> str:
+    """EMBED_ONNX_FILE, else the int8 export matching this CPU (AVX2 when the flags can't be read)"""
+    override = os.environ.get("EMBED_ONNX_FILE")
+    if override:
+        return override
+    if platform.machine().lower() in ('arm64', 'aarch64'):
+        return EMBEDDING_ONNX_FILES['arm64']
+    # /proc/cpuinfo flags on Linux; elsewhere fall back to the avx2 build every x86-64 host since ~2013 runs
+    flags = set()
+    try:
+        with open('/proc/cpuinfo', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('flags'):
+                    flags = set(line.partition(':')[2].split())
+                    break
+    except OSError:
+        pass
+    if 'avx512_vnni' in flags:
+        return EMBEDDING_ONNX_FILES['avx512_vnni']
+    if 'avx512f' in flags:
+        return EMBEDDING_ONNX_FILES['avx512']
+    return EMBEDDING_ONNX_FILES['avx2']
@@ -6,11 +6,24 @@ optimized for CPU-only environments. It combines ChromaDB vector storage with
 NetworkX relationship graphs for intelligent code analysis.
 """
 
+import io
 import os
+import re
+import sys
+import mmap
 import json
+import copy
+import time
 import hashlib
+import itertools
+from array import array
+import threading
+import importlib.util
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Iterable
 from dataclasses import dataclass
 from datetime import datetime
 import logging
@@ -30,6 +43,13 @@ except ImportError:
     SENTENCE_TRANSFORMERS_AVAILABLE = False
     logging.warning("Sentence Transformers not available, using basic embeddings")
 
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+    logging.info("torch not available, leaving embedding thread counts to the backend")
+
 try:
     import networkx as nx
     NETWORKX_AVAILABLE = True
@@ -44,10 +64,50 @@ except ImportError:
     TIKTOKEN_AVAILABLE = False
     logging.warning("tiktoken not available")
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logging.info("orjson not available, using json for RAG metadata files")
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    logging.info("pyarrow not available, saving chunk metadata as JSON")
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+    logging.info("xxhash not available, using md5 for chunk IDs")
+
 from .code_analyzer import MultiLanguageCodeAnalyzer, CodeStructure, ProgrammingLanguage
+from .onnx_models import pick_onnx_file
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+EMBEDDING_OPENVINO_FILE = 'openvino/openvino_model_qint8_quantized.xml'
+EMBEDDING_BATCH_SIZE = 64        # chunks per SentenceTransformer forward pass
+EMBEDDING_POOL_MIN_CHUNKS = 2000  # below this a single process is faster than spinning up a pool
+# Texts are cut to max_seq_length * this many characters before encoding; a generous
+# bound, since even indented code (spaces cost no wordpieces) averages far fewer
+# characters per token, so only text past the model's own truncation point is dropped
+EMBEDDING_MAX_CHARS_PER_TOKEN = 8
+CHROMA_ADD_BATCH_SIZE = 250  # chunks per collection.upsert; ChromaDB recommends batches of 50-250
+CHUNK_PARALLEL_MIN_FILES = 32  # below this a process pool costs more to start than chunking saves
+QUERY_CACHE_SIZE = 2000
+QUERY_CACHE_TTL_SECONDS = 600
+METADATA_WRITE_BUFFER_SIZE = 1024 * 1024  # bytes; the metadata files run to several MB on large repos
+
+# Separator line inside a gitingest file section ("=====...")
+_SEPARATOR_LINE_RE = re.compile(r'^=[^\n]{10,}(?:\n|\Z)', re.M)
+
 
 @dataclass
 class CodeChunk:
@@ -84,62 +144,225 @@ class RAGMetrics:
     last_updated: str
 
 
+class QueryCache:
+    """Thread-safe LRU cache of query results with TTL expiry"""
+    
+    def __init__(self, max_size: int = QUERY_CACHE_SIZE, ttl_seconds: float = QUERY_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, QueryResult]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def make_key(collection_name: str, question: str, max_results: int, *options) -> Tuple:
+        """Cache key; options are any further query arguments that change the result"""
+        return (collection_name, hashlib.blake2b(question.encode('utf-8')).hexdigest(), max_results, *options)
+    
+    def get(self, key: Tuple) -> Optional[QueryResult]:
+        """Return a copy of the cached result, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, result = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Callers may mutate the result, so hand out a copy rather than the cached object
+        return copy.deepcopy(result)
+    
+    def put(self, key: Tuple, result: QueryResult) -> None:
+        entry = (time.monotonic(), copy.deepcopy(result))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, collection_name: Optional[str] = None) -> None:
+        """Drop cached results for one collection, or all of them"""
+        with self._lock:
+            if collection_name is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == collection_name]:
+                    del self._entries[key]
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
 class GitingestParser:
     """Parses gitingest output into structured format"""
     
     @staticmethod
     def parse_gitingest_file(file_path: str) -> Dict[str, str]:
         """Parse gitingest .txt file and extract all files with content"""
-        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-            content = f.read()
-        
-        return GitingestParser.parse_gitingest_content(content)
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return {}
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                if buf.find(b'\r') >= 0:
+                    # Text mode would translate \r\n and lone \r line endings, which can create headers
+                    content = buf[:].decode('utf-8', 'replace').replace('\r\n', '\n').replace('\r', '\n')
+                    return GitingestParser.parse_gitingest_content(content)
+                
+                # Find the headers on the mapped file and decode one file section at a time,
+                # so the digest is never held as a whole str
+                marker = b'\nFILE: '
+                starts = [len(marker) - 1] if buf[:len(marker) - 1] == marker[1:] else []
+                pos = buf.find(marker)
+                while pos >= 0:
+                    starts.append(pos + len(marker))
+                    pos = buf.find(marker, pos + len(marker))
+                
+                files = {}
+                for k, start in enumerate(starts):
+                    end = starts[k + 1] - len(marker) if k + 1 < len(starts) else len(buf)
+                    GitingestParser._add_section(files, buf[start:end].decode('utf-8', 'replace'))
+                return files
     
     @staticmethod
     def parse_gitingest_content(content: str) -> Dict[str, str]:
         """Parse gitingest content and extract files"""
         files = {}
-        lines = content.split('\n')
-        
-        current_file = None
-        current_content = []
-        in_file_section = False
-        
-        for line in lines:
-            # Detect file headers
-            if line.startswith('FILE: '):
-                # Save previous file
-                if current_file and current_content:
-                    # Remove empty lines at the end
-                    while current_content and not current_content[-1].strip():
-                        current_content.pop()
-                    files[current_file] = '\n'.join(current_content)
-                
-                # Start new file
-                current_file = line.replace('FILE: ', '').strip()
-                current_content = []
-                in_file_section = True
-                
-            elif line.startswith('=') and len(line) > 10:
-                # Skip separator lines
-                continue
-                
-            elif line.startswith('Directory structure:'):
-                # Skip directory structure section
-                in_file_section = False
-                current_file = None
-                
-            elif in_file_section and current_file:
-                # Add content line
-                current_content.append(line)
         
-        # Add last file
-        if current_file and current_content:
-            while current_content and not current_content[-1].strip():
-                current_content.pop()
-            files[current_file] = '\n'.join(current_content)
+        # One C-level split into [preamble, section1, section2, ...], each section
+        # being a file header's remainder followed by the file's lines
+        sections = ('\n' + content).split('\nFILE: ')
+        for section in sections[1:]:
+            GitingestParser._add_section(files, section)
         
         return files
+    
+    @staticmethod
+    def _add_section(files: Dict[str, str], section: str) -> None:
+        """Add the file in one section (the text after a 'FILE: ' marker) to files"""
+        header_end = section.find('\n')
+        if header_end < 0:
+            return  # No lines after the header
+        file_path = section[:header_end].replace('FILE: ', '').strip()
+        if not file_path:
+            return
+        start, end = header_end + 1, len(section)
+        
+        # A directory structure section drops the file
+        if section.startswith('Directory structure:', start) or section.find('\nDirectory structure:', start) >= 0:
+            return
+        
+        # Skip separator lines, walking in from both ends so only the rare
+        # interior ones need a regex pass; keep the file if any other line is left
+        line_count = section.count('\n', start) + 1
+        separators = 0
+        while section.startswith('=', start):
+            line_end = section.find('\n', start)
+            if line_end < 0:
+                line_end = end
+            if line_end - start <= 10:
+                break
+            start = min(line_end + 1, end)
+            separators += 1
+        while end > start:
+            line_start = max(section.rfind('\n', start, end) + 1, start)
+            if not section.startswith('=', line_start) or end - line_start <= 10:
+                break
+            end = max(line_start - 1, start)
+            separators += 1
+        body = section[start:end]
+        if '\n=' in body:
+            body, interior = _SEPARATOR_LINE_RE.subn('', body)
+            separators += interior
+        if separators >= line_count:
+            return
+        
+        # Remove empty lines at the end (the last non-empty line keeps its trailing whitespace)
+        text_end = len(body.rstrip())
+        last_line_end = body.find('\n', text_end) if text_end else 0
+        files[file_path] = body[:last_line_end] if last_line_end >= 0 else body
+
+
+def _json_dumps(value: Any) -> str:
+    """Compact JSON string, with orjson when installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(value)
+
+
+def _write_json(path: Path, data: Any) -> None:
+    """Write data as indented UTF-8 JSON, with orjson when installed"""
+    with open(path, 'wb', buffering=METADATA_WRITE_BUFFER_SIZE) as f:
+        if ORJSON_AVAILABLE:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            # json.dump emits many small str pieces; the text wrapper feeds them into the same buffer
+            text = io.TextIOWrapper(f, encoding='utf-8', write_through=True)
+            json.dump(data, text, indent=2)
+            text.detach()
+
+
+def _write_json_array(path: Path, items: Iterable[Any]) -> None:
+    """Write items as an indented JSON array one element at a time, same layout as _write_json"""
+    with open(path, 'wb', buffering=METADATA_WRITE_BUFFER_SIZE) as f:
+        sep = b'[\n  '
+        for item in items:
+            if ORJSON_AVAILABLE:
+                data = orjson.dumps(item, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            else:
+                data = json.dumps(item, indent=2).encode('utf-8')
+            # JSON strings never hold raw newlines, so this only nests the element's own lines
+            f.write(sep)
+            f.write(data.replace(b'\n', b'\n  '))
+            sep = b',\n  '
+        f.write(b'[]' if sep == b'[\n  ' else b'\n]')
+
+
+# Metadata value handling for ChromaDB, dispatched on exact type; subclasses
+# (e.g. enums, OrderedDict) fall back to the isinstance checks once per value
+_KIND_SKIP, _KIND_SCALAR, _KIND_JSON, _KIND_STR = 'skip', 'scalar', 'json', 'str'
+_METADATA_KINDS = {
+    type(None): _KIND_SKIP,
+    str: _KIND_SCALAR,
+    int: _KIND_SCALAR,
+    float: _KIND_SCALAR,
+    bool: _KIND_SCALAR,
+    list: _KIND_JSON,
+    dict: _KIND_JSON,
+}
+
+
+def _metadata_kind(value: Any) -> str:
+    if isinstance(value, (list, dict)):
+        return _KIND_JSON
+    if isinstance(value, (str, int, float, bool)):
+        return _KIND_SCALAR
+    return _KIND_STR
+
+
+def _file_ext(file_path: str) -> str:
+    """Extension as Path(file_path).suffix would give it, or 'no-ext'"""
+    name = file_path.rstrip('/').rpartition('/')[2]
+    dot = name.rfind('.')
+    return name[dot:] if 0 < dot < len(name) - 1 else 'no-ext'
+
+
+@lru_cache(maxsize=4)
+def _get_tiktoken_encoding(name: str):
+    """Shared tiktoken encoding, built once per process"""
+    return tiktoken.get_encoding(name)
 
 
 class CodeChunker:
@@ -147,41 +370,78 @@ class CodeChunker:
     
     def __init__(self, max_chunk_size: int = 1000):
         self.max_chunk_size = max_chunk_size
-        if TIKTOKEN_AVAILABLE:
-            self.tokenizer = tiktoken.get_encoding("cl100k_base")
-        else:
-            self.tokenizer = None
+        self.tokenizer = _get_tiktoken_encoding("cl100k_base") if TIKTOKEN_AVAILABLE else None
+    
+    @staticmethod
+    def context_text(chunk: CodeChunk) -> str:
+        """Text of a chunk as it appears in LLM context"""
+        return f"\n--- {chunk.chunk_type.upper()}: {chunk.file_path} ---\n{chunk.content}\n"
+    
+    def count_tokens(self, texts: List[str]) -> List[float]:
+        """Token counts in one multi-threaded call; simple token estimation if tiktoken not available"""
+        if self.tokenizer:
+            return [len(tokens) for tokens in self.tokenizer.encode_ordinary_batch(
+                texts, num_threads=os.cpu_count() or 1
+            )]
+        return [len(text.split()) * 1.3 for text in texts]  # Rough estimate
+    
+    def add_token_counts(self, chunks: List[CodeChunk]) -> None:
+        """Store each chunk's context token count in its metadata, so queries never re-tokenize it"""
+        if not self.tokenizer:
+            return
+        token_counts = self.count_tokens([self.context_text(chunk) for chunk in chunks])
+        for chunk, token_count in zip(chunks, token_counts):
+            chunk.metadata['token_count'] = token_count
     
     def create_chunks(self, project_structure: Dict[str, CodeStructure]) -> List[CodeChunk]:
-        """Create intelligent chunks from project structure"""
+        """Create intelligent chunks from project structure, fanning out to a process pool for large projects"""
+        workers = os.cpu_count() or 1
+        if workers < 2 or len(project_structure) < CHUNK_PARALLEL_MIN_FILES:
+            chunks = []
+            for file_path, structure in project_structure.items():
+                chunks.extend(self.create_file_chunks(file_path, structure))
+            return chunks
+        
+        items = list(project_structure.items())
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(itertools.chain.from_iterable(executor.map(
+                _file_to_chunks, items, itertools.repeat(self.max_chunk_size),
+                chunksize=max(1, len(items) // (4 * workers))
+            )))
+    
+    def create_file_chunks(self, file_path: str, structure: CodeStructure) -> List[CodeChunk]:
+        """Create the chunks for a single file"""
         chunks = []
         
-        for file_path, structure in project_structure.items():
-            # Create chunks for functions
-            for func in structure.functions:
-                chunk = self._create_function_chunk(func, file_path, structure.language)
-                chunks.append(chunk)
-            
-            # Create chunks for classes
-            for cls in structure.classes:
-                chunk = self._create_class_chunk(cls, file_path, structure.language)
-                chunks.append(chunk)
-                
-                # Create chunks for methods
-                for method in cls.methods:
-                    chunk = self._create_method_chunk(method, cls.name, file_path, structure.language)
-                    chunks.append(chunk)
-            
-            # Create chunks for imports
-            if structure.imports:
-                chunk = self._create_imports_chunk(structure.imports, file_path, structure.language)
-                chunks.append(chunk)
+        # Create chunks for functions
+        for func in structure.functions:
+            chunk = self._create_function_chunk(func, file_path, structure.language)
+            chunks.append(chunk)
+        
+        # Create chunks for classes
+        for cls in structure.classes:
+            chunk = self._create_class_chunk(cls, file_path, structure.language)
+            chunks.append(chunk)
             
-            # Create file-level chunk for small files
-            if structure.total_lines < 50:
-                chunk = self._create_file_chunk(structure, file_path)
+            # Create chunks for methods
+            for method in cls.methods:
+                chunk = self._create_method_chunk(method, cls.name, file_path, structure.language)
                 chunks.append(chunk)
         
+        # Create chunks for imports
+        if structure.imports:
+            chunk = self._create_imports_chunk(structure.imports, file_path, structure.language)
+            chunks.append(chunk)
+        
+        # Create file-level chunk for small files
+        if structure.total_lines < 50:
+            chunk = self._create_file_chunk(structure, file_path)
+            chunks.append(chunk)
+        
+        file_ext = _file_ext(file_path)
+        for chunk in chunks:
+            chunk.metadata['file_ext'] = file_ext
+        
         return chunks
     
     def _create_function_chunk(self, func, file_path: str, language: ProgrammingLanguage) -> CodeChunk:
@@ -361,9 +621,24 @@ class CodeChunker:
     def _generate_chunk_id(self, file_path: str, name: str, chunk_type: str) -> str:
         """Generate unique chunk ID"""
         content = f"{file_path}:{name}:{chunk_type}"
+        if XXHASH_AVAILABLE:
+            return xxhash.xxh3_64_hexdigest(content)[:12]
         return hashlib.md5(content.encode()).hexdigest()[:12]
 
 
+# One chunker per worker process, built on its first task
+_worker_chunker: Optional[CodeChunker] = None
+
+
+def _file_to_chunks(item: Tuple[str, CodeStructure], max_chunk_size: int) -> List[CodeChunk]:
+    """Process-pool entry point for CodeChunker.create_chunks"""
+    global _worker_chunker
+    if _worker_chunker is None or _worker_chunker.max_chunk_size != max_chunk_size:
+        _worker_chunker = CodeChunker(max_chunk_size)
+    file_path, structure = item
+    return _worker_chunker.create_file_chunks(file_path, structure)
+
+
 class RelationshipGraphBuilder:
     """Builds relationship graphs using NetworkX"""
     
@@ -372,6 +647,11 @@ class RelationshipGraphBuilder:
             raise ImportError("NetworkX is required for relationship graphs")
         
         self.graph = nx.DiGraph()
+        # Integer-indexed CSR adjacency of self.graph for traversals, built on first use
+        self._node_index: Dict[str, int] = {}
+        self._nodes: List[str] = []
+        self._csr: Optional[Tuple[array, array]] = None
+        self._reverse_csr: Optional[Tuple[array, array]] = None
     
     def build_graph(self, project_structure: Dict[str, CodeStructure], chunks: List[CodeChunk]) -> nx.DiGraph:
         """Build relationship graph from project structure"""
@@ -392,6 +672,7 @@ class RelationshipGraphBuilder:
                 self.graph.add_node(cls_id, type="class", name=cls.name, file=file_path)
                 self.graph.add_edge(file_path, cls_id, relationship="contains")
         
+        self._csr = self._reverse_csr = None
         return self.graph
     
     def find_related_nodes(self, node_id: str, max_depth: int = 2) -> List[str]:
@@ -399,35 +680,83 @@ class RelationshipGraphBuilder:
         if not self.graph.has_node(node_id):
             return []
         
-        related = set()
+        if self._csr is None:
+            self._finalize_csr()
+        source = self._node_index[node_id]
         
-        # Get neighbors at different depths
-        for depth in range(1, max_depth + 1):
-            try:
-                # Outgoing edges (what this node calls/uses)
-                successors = list(nx.single_source_shortest_path_length(self.graph, node_id, cutoff=depth).keys())
-                related.update(successors)
-                
-                # Incoming edges (what calls/uses this node)
-                predecessors = list(nx.single_source_shortest_path_length(self.graph.reverse(), node_id, cutoff=depth).keys())
-                related.update(predecessors)
-            except nx.NetworkXError:
-                continue
+        # One depth-limited BFS each way already covers every shallower depth
+        # Outgoing edges (what this node calls/uses)
+        related = self._bfs(self._csr, source, max_depth)
+        
+        # Incoming edges (what calls/uses this node)
+        related |= self._bfs(self._reverse_csr, source, max_depth)
         
         # Remove the original node
-        related.discard(node_id)
-        return list(related)
+        related.discard(source)
+        return [self._nodes[i] for i in related]
+    
+    def _finalize_csr(self) -> None:
+        """Index the graph's nodes and build forward and reverse CSR (indptr, indices) arrays"""
+        self._nodes = list(self.graph)
+        self._node_index = {node: i for i, node in enumerate(self._nodes)}
+        self._csr = self._build_csr(self.graph.succ)
+        self._reverse_csr = self._build_csr(self.graph.pred)
+    
+    def _build_csr(self, adjacency) -> Tuple[array, array]:
+        node_index = self._node_index
+        indptr = array('I', [0])
+        indices = array('I')
+        for node in self._nodes:
+            indices.extend(node_index[neighbor] for neighbor in adjacency[node])
+            indptr.append(len(indices))
+        return indptr, indices
+    
+    @staticmethod
+    def _bfs(csr: Tuple[array, array], source: int, max_depth: int) -> set:
+        """Indexes of the nodes reachable from source within max_depth edges (source included)"""
+        indptr, indices = csr
+        seen = {source}
+        frontier = [source]
+        for _ in range(max_depth):
+            next_frontier = []
+            for u in frontier:
+                for v in indices[indptr[u]:indptr[u + 1]]:
+                    if v not in seen:
+                        seen.add(v)
+                        next_frontier.append(v)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return seen
+
+
+def _load_embedding_model(backend: str = "onnx", quantize: bool = True) -> 'SentenceTransformer':
+    """Load the MiniLM embedding model, on ONNX Runtime/OpenVINO when their extras are installed"""
+    if backend == "onnx" and importlib.util.find_spec("optimum") and importlib.util.find_spec("onnxruntime"):
+        model_kwargs = {"provider": "CPUExecutionProvider"}
+        if quantize:
+            model_kwargs["file_name"] = pick_onnx_file()
+        return SentenceTransformer(EMBEDDING_MODEL_NAME, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+    if backend == "openvino" and importlib.util.find_spec("optimum") and importlib.util.find_spec("openvino"):
+        model_kwargs = {"file_name": EMBEDDING_OPENVINO_FILE} if quantize else {}
+        return SentenceTransformer(EMBEDDING_MODEL_NAME, device="cpu", backend="openvino", model_kwargs=model_kwargs)
+    if backend != "torch":
+        logger.info(f"{backend} backend not available, using torch for embeddings")
+    return SentenceTransformer(EMBEDDING_MODEL_NAME, device="cpu")
 
 
 class CPUOptimizedRAGSystem:
     """Main RAG system optimized for CPU-only environments"""
     
-    def __init__(self, storage_path: str = "./rag_storage"):
+    def __init__(self, storage_path: str = "./rag_storage", embedding_batch_size: int = EMBEDDING_BATCH_SIZE,
+                 embedding_workers: int = 1, embedding_backend: str = "onnx", quantize: bool = True,
+                 chroma_batch_size: int = CHROMA_ADD_BATCH_SIZE):
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(exist_ok=True)
         
         # Initialize components
-        self.code_analyzer = MultiLanguageCodeAnalyzer()
+        self.code_analyzer = MultiLanguageCodeAnalyzer(cache_path=str(self.storage_path / "analysis_cache.sqlite"))
         self.chunker = CodeChunker()
         self.graph_builder = RelationshipGraphBuilder()
         
@@ -441,23 +770,37 @@ class CPUOptimizedRAGSystem:
                 )
             )
             self.collection = None
+            self._collections: Dict[str, Any] = {}  # name -> collection handle
+            self._counts: Dict[str, int] = {}  # name -> chunk count, refreshed after writes
         else:
             raise ImportError("ChromaDB is required for RAG system")
         
         # Initialize embedding model
         if SENTENCE_TRANSFORMERS_AVAILABLE:
-            # Use small, CPU-optimized model
-            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+            # Use small, CPU-optimized model (int8 ONNX/OpenVINO export when available)
+            self.embedding_model = _load_embedding_model(embedding_backend, quantize)
+            self._configure_embedding_threads()
         else:
             # Use ChromaDB's default embeddings
             self.embedding_model = None
             self.logger.warning("Using ChromaDB default embeddings instead of sentence transformers")
-        
-        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.embedding_batch_size = embedding_batch_size
+        self.embedding_workers = embedding_workers
+        # The encode pool pickles the model into each worker, which ONNX Runtime/OpenVINO sessions
+        # don't support; those backends already use every core with their own intra-op threads
+        if (embedding_workers > 1 and self.embedding_model is not None
+                and getattr(self.embedding_model, "backend", "torch") != "torch"):
+            self.logger.warning(
+                f"embedding_workers={embedding_workers} needs embedding_backend='torch'; "
+                f"the {self.embedding_model.backend} model embeds in a single process"
+            )
+            self.embedding_workers = 1
+        self.chroma_batch_size = chroma_batch_size
+        self.query_cache = QueryCache()
     
     def build_rag_from_gitingest(self, gitingest_file_path: str, collection_name: str = "code_rag") -> RAGMetrics:
         """Build complete RAG system from gitingest file"""
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         self.logger.info(f"Building RAG system from {gitingest_file_path}")
         
@@ -473,6 +816,7 @@ class CPUOptimizedRAGSystem:
         # Step 3: Create chunks
         self.logger.info("Creating intelligent chunks...")
         chunks = self.chunker.create_chunks(project_structure)
+        self.chunker.add_token_counts(chunks)
         self.logger.info(f"Created {len(chunks)} chunks")
         
         # Step 4: Build relationship graph
@@ -482,11 +826,12 @@ class CPUOptimizedRAGSystem:
         # Step 5: Generate embeddings and store in ChromaDB
         self.logger.info("Generating embeddings and storing in vector database...")
         self._store_chunks_in_chromadb(chunks, collection_name)
+        self.query_cache.invalidate(collection_name)
         
         # Step 6: Save metadata and graphs
         self._save_metadata(project_structure, chunks)
         
-        build_time = (datetime.now() - start_time).total_seconds()
+        build_time = time.perf_counter() - start_time
         
         # Calculate metrics
         languages = list(set(structure.language.value for structure in project_structure.values()))
@@ -505,30 +850,87 @@ class CPUOptimizedRAGSystem:
     
     def query(self, question: str, max_results: int = 10, collection_name: str = "code_rag") -> QueryResult:
         """Query the RAG system with enhanced function discovery"""
-        start_time = datetime.now()
+        return self.batch_query([question], max_results=max_results, collection_name=collection_name)[0]
+    
+    def batch_query(self, questions: List[str], max_results: int = 10, collection_name: str = "code_rag",
+                    include_documents: bool = True, min_confidence: Optional[float] = None) -> List[QueryResult]:
+        """
+        Query the RAG system for several questions with one embed call and one ChromaDB query
+        
+        Args:
+            questions: Query strings
+            max_results: Maximum results per question
+            collection_name: ChromaDB collection name
+            include_documents: Fetch chunk contents; when False, chunks come back with empty content
+            min_confidence: Only keep results whose confidence is above this
+            
+        Returns:
+            One QueryResult per question, in order
+        """
+        start_time = time.perf_counter()
+        
+        query_results: List[Optional[QueryResult]] = []
+        cache_keys = []
+        pending = []  # indexes of the questions that missed the cache
+        for i, question in enumerate(questions):
+            cache_key = self.query_cache.make_key(collection_name, question, max_results, include_documents, min_confidence)
+            cached = self.query_cache.get(cache_key)
+            if cached is not None:
+                cached.query_time = time.perf_counter() - start_time
+            else:
+                pending.append(i)
+            query_results.append(cached)
+            cache_keys.append(cache_key)
+        
+        if not pending:
+            return query_results
         
         # Get or create collection
-        if not self.collection or self.collection.name != collection_name:
-            self.collection = self.chroma_client.get_collection(collection_name)
+        self.collection = self._get_collection(collection_name)
         
-        # Perform semantic search
+        # Perform semantic search (embedding the questions with the same model as the stored chunks)
+        pending_questions = [questions[i] for i in pending]
+        query_embeddings = self._embed(pending_questions)
         results = self.collection.query(
-            query_texts=[question],
+            query_embeddings=query_embeddings,
+            query_texts=None if query_embeddings else pending_questions,
             n_results=max_results,
-            include=["documents", "metadatas", "distances"]
+            include=["documents", "metadatas", "distances"] if include_documents else ["metadatas", "distances"]
         )
+        total_chunks = self._counts.get(collection_name)
+        if total_chunks is None:
+            total_chunks = self._counts[collection_name] = self.collection.count()
+        query_time = time.perf_counter() - start_time
+        
+        for n, i in enumerate(pending):
+            result = self._build_query_result(results, n, query_time, total_chunks, min_confidence)
+            self.query_cache.put(cache_keys[i], result)
+            query_results[i] = result
         
+        return query_results
+    
+    def _build_query_result(self, results: Dict[str, Any], n: int, query_time: float, total_chunks: int,
+                            min_confidence: Optional[float] = None) -> QueryResult:
+        """Convert the n-th result set of a ChromaDB query into a QueryResult"""
         # Convert results to CodeChunk objects
         chunks = []
         confidence_scores = []
         
-        for i, (doc, metadata, distance) in enumerate(zip(
-            results['documents'][0],
-            results['metadatas'][0], 
-            results['distances'][0]
-        )):
+        ids = results['ids'][n]
+        documents = results['documents'][n] if results.get('documents') else itertools.repeat('')
+        for chunk_id, doc, metadata, distance in zip(
+            ids,
+            documents,
+            results['metadatas'][n],
+            results['distances'][n]
+        ):
+            # Convert distance to confidence (lower distance = higher confidence)
+            confidence = max(0, 1 - distance)
+            if min_confidence is not None and confidence <= min_confidence:
+                break  # Results come sorted by distance, so the rest are below the threshold too
+            
             chunk = CodeChunk(
-                chunk_id=results['ids'][0][i],
+                chunk_id=chunk_id,
                 content=doc,
                 file_path=metadata.get('file_path', ''),
                 chunk_type=metadata.get('chunk_type', ''),
@@ -538,22 +940,17 @@ class CPUOptimizedRAGSystem:
                 metadata=metadata
             )
             chunks.append(chunk)
-            
-            # Convert distance to confidence (lower distance = higher confidence)
-            confidence = max(0, 1 - distance)
             confidence_scores.append(confidence)
         
         # Get relationship information
         relationships = self._get_relationships_for_chunks(chunks)
         
-        query_time = (datetime.now() - start_time).total_seconds()
-        
         return QueryResult(
             chunks=chunks,
             relationships=relationships,
             confidence_scores=confidence_scores,
             query_time=query_time,
-            total_chunks_searched=self.collection.count()
+            total_chunks_searched=total_chunks
         )
     
     def discover_functions(self, search_queries: List[Dict[str, str]], max_results: int = 3, collection_name: str = "code_rag") -> Dict[str, QueryResult]:
@@ -570,14 +967,15 @@ class CPUOptimizedRAGSystem:
         """
         results = {}
         
-        for search_item in search_queries:
+        # Run all searches as one batched query
+        queries = [search_item['query'] for search_item in search_queries]
+        batch_results = self.batch_query(queries, max_results=max_results, collection_name=collection_name)
+        
+        for search_item, result in zip(search_queries, batch_results):
             query = search_item['query']
             expected = search_item.get('expect', '')
             
             self.logger.info(f"Searching for: '{query}' - Expected: {expected}")
-            
-            # Perform the query
-            result = self.query(query, max_results=max_results, collection_name=collection_name)
             results[query] = result
             
             # Log results for debugging
@@ -587,7 +985,8 @@ class CPUOptimizedRAGSystem:
         
         return results
     
-    def analyze_code_patterns(self, pattern_queries: List[str], max_results: int = 2, collection_name: str = "code_rag") -> Dict[str, QueryResult]:
+    def analyze_code_patterns(self, pattern_queries: List[str], max_results: int = 2, collection_name: str = "code_rag",
+                              include_documents: bool = False) -> Dict[str, QueryResult]:
         """
         Analyze specific code patterns across the codebase
         
@@ -595,38 +994,23 @@ class CPUOptimizedRAGSystem:
             pattern_queries: List of pattern search strings
             max_results: Maximum results per pattern
             collection_name: ChromaDB collection name
+            include_documents: Fetch chunk contents (left empty by default)
             
         Returns:
             Dictionary mapping pattern strings to QueryResult objects
         """
         results = {}
         
-        for pattern in pattern_queries:
+        # Run all patterns as one batched query; only results with some relevance (confidence > 0.01) are kept
+        batch_results = self.batch_query(
+            pattern_queries, max_results=max_results, collection_name=collection_name,
+            include_documents=include_documents, min_confidence=0.01
+        )
+        
+        for pattern, result in zip(pattern_queries, batch_results):
             self.logger.info(f"Analyzing pattern: '{pattern}'")
-            
-            result = self.query(pattern, max_results=max_results, collection_name=collection_name)
-            
-            # Filter results by confidence threshold
-            filtered_chunks = []
-            filtered_scores = []
-            
-            for chunk, confidence in zip(result.chunks, result.confidence_scores):
-                if confidence > 0.01:  # Only include results with some relevance
-                    filtered_chunks.append(chunk)
-                    filtered_scores.append(confidence)
-            
-            # Create filtered result
-            filtered_result = QueryResult(
-                chunks=filtered_chunks,
-                relationships=result.relationships,
-                confidence_scores=filtered_scores,
-                query_time=result.query_time,
-                total_chunks_searched=result.total_chunks_searched
-            )
-            
-            results[pattern] = filtered_result
-            
-            self.logger.debug(f"Found {len(filtered_chunks)} relevant results for pattern '{pattern}'")
+            results[pattern] = result
+            self.logger.debug(f"Found {len(result.chunks)} relevant results for pattern '{pattern}'")
         
         return results
     
@@ -642,27 +1026,21 @@ class CPUOptimizedRAGSystem:
         Returns:
             Dictionary with comprehensive analysis results
         """
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         # Get all chunks for analysis
         all_results = self.query("*", max_results=50, collection_name=collection_name)
         
-        # Analyze file types
-        file_types = {}
-        chunk_types = {}
-        languages = {}
+        # Analyze file types (the extension is stored at chunking time; older collections lack it)
+        file_types = Counter(
+            chunk.metadata.get('file_ext') or _file_ext(chunk.file_path) for chunk in all_results.chunks
+        )
+        
+        # Chunk type analysis
+        chunk_types = Counter(chunk.chunk_type for chunk in all_results.chunks)
         
-        for chunk in all_results.chunks:
-            # File extension analysis
-            file_path = Path(chunk.file_path)
-            ext = file_path.suffix or 'no-ext'
-            file_types[ext] = file_types.get(ext, 0) + 1
-            
-            # Chunk type analysis
-            chunk_types[chunk.chunk_type] = chunk_types.get(chunk.chunk_type, 0) + 1
-            
-            # Language analysis
-            languages[chunk.language] = languages.get(chunk.language, 0) + 1
+        # Language analysis
+        languages = Counter(chunk.language for chunk in all_results.chunks)
         
         # Enhanced function discovery searches
         function_searches = [
@@ -702,7 +1080,7 @@ class CPUOptimizedRAGSystem:
         # Perform pattern analysis
         pattern_results = self.analyze_code_patterns(pattern_searches, max_results=2, collection_name=collection_name)
         
-        analysis_time = (datetime.now() - start_time).total_seconds()
+        analysis_time = time.perf_counter() - start_time
         
         return {
             'analysis_metadata': {
@@ -736,15 +1114,16 @@ class CPUOptimizedRAGSystem:
             reverse=True
         )
         
-        for chunk, confidence in sorted_chunks:
-            chunk_text = f"\n--- {chunk.chunk_type.upper()}: {chunk.file_path} ---\n{chunk.content}\n"
-            
-            # Simple token estimation if tiktoken not available
-            if self.chunker.tokenizer:
-                chunk_tokens = len(self.chunker.tokenizer.encode(chunk_text))
-            else:
-                chunk_tokens = len(chunk_text.split()) * 1.3  # Rough estimate
-            
+        chunk_texts = [self.chunker.context_text(chunk) for chunk, _ in sorted_chunks]
+        
+        # Token counts were stored at index time; only chunks without one are tokenized here
+        token_counts = [chunk.metadata.get('token_count') for chunk, _ in sorted_chunks]
+        missing = [i for i, token_count in enumerate(token_counts) if token_count is None]
+        if missing:
+            for i, token_count in zip(missing, self.chunker.count_tokens([chunk_texts[i] for i in missing])):
+                token_counts[i] = token_count
+        
+        for chunk_text, chunk_tokens in zip(chunk_texts, token_counts):
             if current_tokens + chunk_tokens > max_tokens:
                 break
             
@@ -753,90 +1132,202 @@ class CPUOptimizedRAGSystem:
         
         return ''.join(context_parts)
     
+    def _configure_embedding_threads(self) -> None:
+        """Use every core (or RAG_THREADS) for torch matmuls and pay the first-call kernel setup up front"""
+        # ONNX Runtime/OpenVINO models manage their own threads; torch settings only apply to torch models
+        if TORCH_AVAILABLE and getattr(self.embedding_model, "backend", "torch") == "torch":
+            threads = self._embedding_thread_count()
+            torch.set_num_threads(threads)
+            try:
+                torch.set_num_interop_threads(max(1, threads // 2))
+            except RuntimeError:
+                pass  # Only settable once per process, before any parallel work has run
+            self.logger.info(f"Embedding with {torch.get_num_threads()} torch threads")
+        self.embedding_model.encode(["warmup"], show_progress_bar=False)
+    
+    def _embedding_thread_count(self) -> int:
+        """RAG_THREADS when it is a positive integer, otherwise every core"""
+        value = os.environ.get("RAG_THREADS")
+        if value:
+            try:
+                threads = int(value)
+                if threads > 0:
+                    return threads
+            except ValueError:
+                pass
+            self.logger.warning(f"Ignoring invalid RAG_THREADS={value!r}, using all cores")
+        return os.cpu_count() or 1
+    
+    def _embed(self, texts: List[str]) -> Optional[List[List[float]]]:
+        """Embed texts in batched forward passes, or None to leave embedding to ChromaDB"""
+        if self.embedding_model is None or not texts:
+            return None
+        
+        # Skip tokenizing text the model would truncate anyway (chunk headers come first, so they are kept)
+        max_chars = (self.embedding_model.max_seq_length or 512) * EMBEDDING_MAX_CHARS_PER_TOKEN
+        texts = [text[:max_chars] for text in texts]
+        
+        # Identical texts (trivial getters, empty __init__s, ...) are embedded once and scattered back
+        unique_index: Dict[str, int] = {}
+        positions = [unique_index.setdefault(text, len(unique_index)) for text in texts]
+        texts = list(unique_index)
+        
+        # Worker startup pickles the model into each process, only pays off on big repos
+        if self.embedding_workers > 1 and len(texts) >= EMBEDDING_POOL_MIN_CHUNKS:
+            pool = self.embedding_model.start_multi_process_pool(target_devices=["cpu"] * self.embedding_workers)
+            try:
+                embeddings = self.embedding_model.encode(
+                    texts, pool=pool, batch_size=self.embedding_batch_size,
+                    normalize_embeddings=True, show_progress_bar=False
+                )
+            finally:
+                self.embedding_model.stop_multi_process_pool(pool)
+        else:
+            embeddings = self.embedding_model.encode(
+                texts, batch_size=self.embedding_batch_size, convert_to_numpy=True,
+                normalize_embeddings=True, show_progress_bar=False
+            )
+        embeddings = embeddings.tolist()
+        return [embeddings[i] for i in positions]
+    
+    def _get_collection(self, collection_name: str):
+        """Cached ChromaDB collection handle"""
+        collection = self._collections.get(collection_name)
+        if collection is None:
+            collection = self._collections[collection_name] = self.chroma_client.get_collection(collection_name)
+        return collection
+    
     def _store_chunks_in_chromadb(self, chunks: List[CodeChunk], collection_name: str) -> None:
         """Store chunks in ChromaDB with embeddings"""
         # Create or get collection
-        try:
-            self.collection = self.chroma_client.create_collection(collection_name)
-        except Exception:
-            # Collection might already exist
-            self.collection = self.chroma_client.get_collection(collection_name)
+        self.collection = self.chroma_client.get_or_create_collection(collection_name)
+        self._collections[collection_name] = self.collection
+        
+        # Embed every chunk up front so the model sees full batches instead of ChromaDB's per-add calls
+        embeddings = self._embed([chunk.content for chunk in chunks])
         
         # Process chunks in batches
-        batch_size = 100
-        for i in range(0, len(chunks), batch_size):
-            batch = chunks[i:i + batch_size]
-            
-            # Prepare batch data
-            ids = [chunk.chunk_id for chunk in batch]
-            documents = [chunk.content for chunk in batch]
-            metadatas = []
-            
-            for chunk in batch:
-                # Convert metadata to ChromaDB-compatible format (no lists/dicts)
-                metadata = {
-                    'file_path': chunk.file_path,
-                    'chunk_type': chunk.chunk_type,
-                    'language': chunk.language,
-                    'start_line': chunk.start_line,
-                    'end_line': chunk.end_line,
-                }
+        batch_size = self.chroma_batch_size
+        batch_count = (len(chunks) + batch_size - 1) // batch_size
+        
+        # Prepare batch N+1 on a worker thread while batch N is written, which releases the GIL;
+        # at most one prepared batch waits, so memory stays bounded
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            next_batch = executor.submit(self._build_batch, chunks[:batch_size]) if chunks else None
+            for i in range(0, len(chunks), batch_size):
+                ids, documents, metadatas = next_batch.result()
+                if i + batch_size < len(chunks):
+                    next_batch = executor.submit(self._build_batch, chunks[i + batch_size:i + 2 * batch_size])
                 
-                # Add simple metadata fields, converting lists to strings
-                for key, value in chunk.metadata.items():
-                    if value is None:
-                        # Skip None values as ChromaDB doesn't like them
-                        continue
-                    elif isinstance(value, (list, dict)):
-                        # Convert lists/dicts to JSON strings
-                        if value:  # Only if not empty
-                            metadata[f"{key}_json"] = json.dumps(value)
-                    elif isinstance(value, (str, int, float, bool)):
-                        metadata[key] = value
-                    else:
-                        metadata[key] = str(value)
+                # Upsert so re-ingesting into an existing collection updates chunks instead of
+                # skipping known ids; a failed batch is logged and the remaining batches still go in
+                try:
+                    self.collection.upsert(
+                        ids=ids,
+                        embeddings=embeddings[i:i + batch_size] if embeddings else None,
+                        documents=documents,
+                        metadatas=metadatas
+                    )
+                except Exception as e:
+                    self.logger.error(f"Failed to store batch {i//batch_size + 1}/{batch_count}: {e}")
+                    continue
                 
-                metadatas.append(metadata)
-            
-            # Add to collection
-            self.collection.add(
-                ids=ids,
-                documents=documents,
-                metadatas=metadatas
-            )
-            
-            self.logger.debug(f"Stored batch {i//batch_size + 1}/{(len(chunks) + batch_size - 1)//batch_size}")
+                self.logger.debug(f"Stored batch {i//batch_size + 1}/{batch_count}")
+        
+        self._counts[collection_name] = self.collection.count()
+    
+    def _build_batch(self, batch: List[CodeChunk]) -> Tuple[List[str], List[str], List[Dict[str, Any]]]:
+        """Prepare the ids, documents and metadatas of one batch in a single pass"""
+        ids = [None] * len(batch)
+        documents = [None] * len(batch)
+        metadatas = [None] * len(batch)
+        for j, chunk in enumerate(batch):
+            ids[j] = chunk.chunk_id
+            documents[j] = chunk.content
+            metadatas[j] = self._chroma_metadata(chunk)
+        return ids, documents, metadatas
+    
+    @staticmethod
+    def _chroma_metadata(chunk: CodeChunk) -> Dict[str, Any]:
+        """Convert chunk metadata to ChromaDB-compatible format (no lists/dicts)"""
+        metadata = {
+            'file_path': chunk.file_path,
+            'chunk_type': chunk.chunk_type,
+            'language': chunk.language,
+            'start_line': chunk.start_line,
+            'end_line': chunk.end_line,
+        }
+        
+        # Add simple metadata fields, converting lists to strings
+        for key, value in chunk.metadata.items():
+            kind = _METADATA_KINDS.get(type(value))
+            if kind is None:
+                kind = _metadata_kind(value)
+            if kind is _KIND_SCALAR:
+                metadata[key] = value
+            elif kind is _KIND_JSON:
+                # Convert lists/dicts to JSON strings, only if not empty
+                if value:
+                    metadata[f"{key}_json"] = _json_dumps(value)
+            elif kind is _KIND_STR:
+                metadata[key] = str(value)
+            # _KIND_SKIP: ChromaDB doesn't accept None values
+        
+        return metadata
     
     def _save_metadata(self, project_structure: Dict[str, CodeStructure], chunks: List[CodeChunk]) -> None:
         """Save metadata and relationship graph"""
         # Save project structure
         structure_path = self.storage_path / "project_structure.json"
-        with open(structure_path, 'w', encoding='utf-8') as f:
-            serializable_structure = {}
-            for file_path, structure in project_structure.items():
-                serializable_structure[file_path] = {
-                    'language': structure.language.value,
-                    'total_lines': structure.total_lines,
-                    'complexity_score': structure.complexity_score,
-                    'function_count': len(structure.functions),
-                    'class_count': len(structure.classes),
-                    'entry_points': structure.entry_points
-                }
-            json.dump(serializable_structure, f, indent=2)
-        
-        # Save chunks metadata
-        chunks_path = self.storage_path / "chunks_metadata.json"
-        with open(chunks_path, 'w', encoding='utf-8') as f:
-            chunks_data = [{
-                'chunk_id': chunk.chunk_id,
-                'file_path': chunk.file_path,
-                'chunk_type': chunk.chunk_type,
-                'language': chunk.language,
-                'start_line': chunk.start_line,
-                'end_line': chunk.end_line,
-                'metadata': chunk.metadata
-            } for chunk in chunks]
-            json.dump(chunks_data, f, indent=2)
+        serializable_structure = {}
+        for file_path, structure in project_structure.items():
+            serializable_structure[file_path] = {
+                'language': structure.language.value,
+                'total_lines': structure.total_lines,
+                'complexity_score': structure.complexity_score,
+                'function_count': len(structure.functions),
+                'class_count': len(structure.classes),
+                'entry_points': structure.entry_points
+            }
+        _write_json(structure_path, serializable_structure)
+        
+        # Save chunks metadata, as columnar Parquet when pyarrow is installed; the file in the
+        # other format is removed so a stale snapshot from an earlier build can't linger beside it
+        json_path = self.storage_path / "chunks_metadata.json"
+        parquet_path = self.storage_path / "chunks_metadata.parquet"
+        if PYARROW_AVAILABLE and self._write_chunks_parquet(parquet_path, chunks):
+            json_path.unlink(missing_ok=True)
+            return
+        parquet_path.unlink(missing_ok=True)
+        chunks_data = ({
+            'chunk_id': chunk.chunk_id,
+            'file_path': chunk.file_path,
+            'chunk_type': chunk.chunk_type,
+            'language': chunk.language,
+            'start_line': chunk.start_line,
+            'end_line': chunk.end_line,
+            'metadata': chunk.metadata
+        } for chunk in chunks)
+        _write_json_array(json_path, chunks_data)
+    
+    def _write_chunks_parquet(self, path: Path, chunks: List[CodeChunk]) -> bool:
+        """Write chunk metadata to a Parquet file; False if Arrow can't represent it"""
+        try:
+            table = pa.table({
+                'chunk_id': [chunk.chunk_id for chunk in chunks],
+                'file_path': [chunk.file_path for chunk in chunks],
+                'chunk_type': [chunk.chunk_type for chunk in chunks],
+                'language': [chunk.language for chunk in chunks],
+                'start_line': pa.array([chunk.start_line for chunk in chunks], type=pa.int32()),
+                'end_line': pa.array([chunk.end_line for chunk in chunks], type=pa.int32()),
+                # One struct column over the union of metadata keys; absent keys read back as None
+                'metadata': pa.array([chunk.metadata for chunk in chunks]),
+            })
+            pq.write_table(table, path, compression='zstd')
+        except pa.ArrowException as e:
+            self.logger.warning(f"Could not write chunk metadata as Parquet, using JSON: {e}")
+            return False
+        return True
     
     def _get_relationships_for_chunks(self, chunks: List[CodeChunk]) -> Dict[str, List[str]]:
         """Get relationship information for chunks"""
@@ -848,37 +1339,59 @@ class CPUOptimizedRAGSystem:
             'related_files': []
         }
         
+        # Collect every node pattern up front in first-seen order; chunks from the same
+        # file/function share patterns and a repeated pattern only adds duplicates.
+        # An empty function/class name can't match a node, so it gets no pattern, and
+        # function/class nodes only exist under their file node, so a file missing from
+        # the graph rules out all of its patterns with one probe.
+        graph = self.graph_builder.graph
+        node_patterns = {}
         for chunk in chunks:
-            # Get related nodes from graph
-            node_patterns = [
-                f"{chunk.file_path}::{chunk.metadata.get('function_name', '')}",
-                f"{chunk.file_path}::{chunk.metadata.get('class_name', '')}",
-                chunk.file_path
-            ]
-            
-            for pattern in node_patterns:
-                if self.graph_builder.graph.has_node(pattern):
-                    related = self.graph_builder.find_related_nodes(pattern, max_depth=2)
-                    
-                    for related_node in related:
-                        if '::' in related_node:
-                            file_path, item_name = related_node.split('::', 1)
-                            relationships['related_files'].append(file_path)
-        
-        # Remove duplicates and limit results
-        for key in relationships:
-            relationships[key] = list(set(relationships[key]))[:10]
+            file_path = chunk.file_path
+            if not graph.has_node(file_path):
+                continue
+            metadata = chunk.metadata
+            function_name = metadata.get('function_name')
+            if function_name:
+                node_patterns[f"{file_path}::{function_name}"] = None
+            class_name = metadata.get('class_name')
+            if class_name:
+                node_patterns[f"{file_path}::{class_name}"] = None
+            node_patterns[file_path] = None
+        
+        # Get related nodes from graph
+        graph_builder = self.graph_builder
+        related_files = relationships['related_files']
+        for pattern in node_patterns:
+            if graph.has_node(pattern):
+                for related_node in graph_builder.find_related_nodes(pattern, max_depth=2):
+                    if '::' in related_node:
+                        related_files.append(related_node.split('::', 1)[0])
+        
+        # Remove duplicates and limit results, keeping first-seen order
+        for key, values in relationships.items():
+            unique = {}
+            for value in values:
+                unique[value] = None
+                if len(unique) == 10:
+                    break
+            relationships[key] = list(unique)
         
         return relationships
     
     def _calculate_storage_size(self) -> float:
         """Calculate total storage size in MB"""
         total_size = 0
+        pending = [self.storage_path]
         try:
-            for root, dirs, files in os.walk(self.storage_path):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    total_size += os.path.getsize(file_path)
+            # scandir reuses the directory entry's cached stat instead of a getsize call per file
+            while pending:
+                with os.scandir(pending.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            total_size += entry.stat(follow_symlinks=False).st_size
         except Exception:
             pass  # Ignore errors during size calculation
         return total_size / (1024 * 1024)  # Convert to MB
@@ -897,34 +1410,35 @@ class CPUOptimizedRAGSystem:
         # Get comprehensive analysis
         analysis = self.get_comprehensive_analysis(collection_name)
         
-        # Print results in a user-friendly format
-        print(f"\n📊 Analysis Summary:")
-        print(f"   Total chunks analyzed: {analysis['analysis_metadata']['total_chunks_analyzed']}")
-        print(f"   Analysis time: {analysis['analysis_metadata']['analysis_time_seconds']:.2f} seconds")
+        # Print results in a user-friendly format, buffered into a single stdout write
+        out = io.StringIO()
+        print(f"\n📊 Analysis Summary:", file=out)
+        print(f"   Total chunks analyzed: {analysis['analysis_metadata']['total_chunks_analyzed']}", file=out)
+        print(f"   Analysis time: {analysis['analysis_metadata']['analysis_time_seconds']:.2f} seconds", file=out)
         
-        print(f"\n📁 File types indexed:")
+        print(f"\n📁 File types indexed:", file=out)
         for ext, count in list(analysis['file_type_distribution'].items())[:10]:
-            print(f"   {ext}: {count} chunks")
+            print(f"   {ext}: {count} chunks", file=out)
         
-        print(f"\n🧩 Chunk types created:")
+        print(f"\n🧩 Chunk types created:", file=out)
         for chunk_type, count in analysis['chunk_type_distribution'].items():
-            print(f"   {chunk_type}: {count} chunks")
+            print(f"   {chunk_type}: {count} chunks", file=out)
         
-        print(f"\n🌐 Languages detected:")
+        print(f"\n🌐 Languages detected:", file=out)
         for language, count in analysis['language_distribution'].items():
-            print(f"   {language}: {count} chunks")
+            print(f"   {language}: {count} chunks", file=out)
         
-        print(f"\n🎯 Function Discovery Results:")
-        print("=" * 30)
+        print(f"\n🎯 Function Discovery Results:", file=out)
+        print("=" * 30, file=out)
         
         for i, (query, result) in enumerate(analysis['function_discovery_results'].items(), 1):
-            print(f"\n🔎 Search {i}: '{query}'")
-            print(f"   ⚡ Found {len(result.chunks)} results:")
+            print(f"\n🔎 Search {i}: '{query}'", file=out)
+            print(f"   ⚡ Found {len(result.chunks)} results:", file=out)
             
             for chunk, confidence in zip(result.chunks, result.confidence_scores):
                 confidence_emoji = "🎯" if confidence > 0.1 else "📍" if confidence > 0.05 else "📌"
-                print(f"     {confidence_emoji} {chunk.chunk_type} in {chunk.file_path}")
-                print(f"        Confidence: {confidence:.3f}")
+                print(f"     {confidence_emoji} {chunk.chunk_type} in {chunk.file_path}", file=out)
+                print(f"        Confidence: {confidence:.3f}", file=out)
                 
                 # Show metadata if available
                 if chunk.metadata:
@@ -933,21 +1447,22 @@ class CPUOptimizedRAGSystem:
                         if key in chunk.metadata and chunk.metadata[key]:
                             relevant_meta[key] = chunk.metadata[key]
                     if relevant_meta:
-                        print(f"        Metadata: {relevant_meta}")
+                        print(f"        Metadata: {relevant_meta}", file=out)
         
-        print(f"\n🧩 Code Pattern Analysis:")
-        print("=" * 25)
+        print(f"\n🧩 Code Pattern Analysis:", file=out)
+        print("=" * 25, file=out)
         
         for pattern, result in analysis['code_pattern_results'].items():
             if result.chunks:  # Only show patterns with results
-                print(f"\n🔍 Pattern: '{pattern}'")
+                print(f"\n🔍 Pattern: '{pattern}'", file=out)
                 for chunk, confidence in zip(result.chunks[:2], result.confidence_scores[:2]):
-                    print(f"   📄 {chunk.file_path} (confidence: {confidence:.3f})")
+                    print(f"   📄 {chunk.file_path} (confidence: {confidence:.3f})", file=out)
         
-        print(f"\n✅ Enhanced Function Discovery Complete!")
-        print(f"   Successful function searches: {analysis['summary_stats']['successful_function_searches']}")
-        print(f"   Successful pattern searches: {analysis['summary_stats']['successful_pattern_searches']}")
+        print(f"\n✅ Enhanced Function Discovery Complete!", file=out)
+        print(f"   Successful function searches: {analysis['summary_stats']['successful_function_searches']}", file=out)
+        print(f"   Successful pattern searches: {analysis['summary_stats']['successful_pattern_searches']}", file=out)
         
+        sys.stdout.write(out.getvalue())
         return analysis
     
     def cleanup(self):
@@ -955,6 +1470,11 @@ class CPUOptimizedRAGSystem:
         try:
             if hasattr(self, 'collection') and self.collection:
                 self.collection = None
+            if hasattr(self, '_collections'):
+                self._collections.clear()
+                self._counts.clear()
+            if hasattr(self, 'code_analyzer') and self.code_analyzer:
+                self.code_analyzer.close()
             if hasattr(self, 'chroma_client') and self.chroma_client:
                 # Force close the client
                 self.chroma_client = None
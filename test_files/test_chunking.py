@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test that rag_repo.load_and_chunk keeps chunk text verbatim.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add repo root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from rag_repo import load_and_chunk
+
+
+SAMPLE_FILE = '''import { Router } from "./AppRouter"
+
+class RequestHandler:
+    """Handles incoming requests"""
+
+    def __init__(self, Config):
+        self.Config = Config
+
+    def HandleRequest(self, Request):
+        if Request.Method == "GET":
+            return self.Config.Routes.get(Request.Path)
+        return None
+''' * 40
+
+
+def test_chunks_are_verbatim():
+    """Every chunk must be an exact substring of its source file"""
+    ingest_text = (
+        "================================================\n"
+        "FILE: src/handler.py\n"
+        "================================================\n"
+        + SAMPLE_FILE
+    )
+
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as f:
+        f.write(ingest_text)
+        ingest_file = f.name
+
+    try:
+        chunks = load_and_chunk(ingest_file)
+    finally:
+        os.unlink(ingest_file)
+
+    assert len(chunks) > 1, "sample should need more than one chunk"
+    for chunk in chunks:
+        assert chunk["file"] == "src/handler.py"
+        assert chunk["content"] in ingest_text, f"chunk {chunk['id']} is not verbatim source text"
+
+    # case and indentation survive for the symbol/import regexes
+    assert any("class RequestHandler:" in c["content"] for c in chunks)
+    assert any("\n        if Request.Method" in c["content"] for c in chunks)
+    print(f"✅ {len(chunks)} chunks, all verbatim")
+
+
+if __name__ == "__main__":
+    test_chunks_are_verbatim()
@@ -70,7 +70,7 @@ async def test_public_repo():
                 print(f"   • Languages found: {list(repo.language_stats.keys())}")
                 
                 # Debug: show raw output length
-                print(f"   • Raw output length: {len(repo.raw_output)} chars")
+                print(f"   • Raw output length: {len(repo.raw_output or '')} chars")
                 
                 # Show first few files
                 print(f"   • Sample files:")
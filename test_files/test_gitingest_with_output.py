@@ -35,7 +35,8 @@ async def test_and_save_output():
         max_file_size=1024 * 1024,
         timeout=60,
         include_patterns=["*.py", "*.md", "*.txt", "*.json", "*.yml", "*.yaml", "README*", "LICENSE*"],
-        exclude_patterns=[".git", "node_modules", "__pycache__"]
+        exclude_patterns=[".git", "node_modules", "__pycache__"],
+        keep_raw_output=True  # Saved to disk below
     )
     
     processor = GitingestProcessor(config)